@@ -0,0 +1,81 @@
+"""Add vendor_score_aggregates
+
+Revision ID: 4b8d2e6f1a57
+Revises: 9c4e2a7b1d30
+Create Date: 2026-10-17 11:03:27.514230
+
+Existing assessments are folded in on PostgreSQL using the scoring_*
+settings in effect at upgrade time. On other databases, or if assessments
+were written by the previous release after the upgrade, run
+``python -m app.cli repair-score-aggregates``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8d2e6f1a57'
+down_revision: Union[str, None] = '9c4e2a7b1d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'vendor_score_aggregates',
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.Column('score_count', sa.Integer(), nullable=False),
+        sa.Column('weighted_score_sum', sa.Float(), nullable=False),
+        sa.Column('weight_sum', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['core_company.id'], ),
+        sa.PrimaryKeyConstraint('company_id')
+    )
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Mirrors services.score_aggregates: decay anchored at 2020-01-01, an
+    # assessment dated no later than its write time (created_at), undated
+    # ones at it, and the exponent capped at MAX_ANCHOR_EXPONENT
+    decay = '1.0'
+    if settings.scoring_half_life_days > 0:
+        decay = (
+            "power(2.0, LEAST(EXTRACT(EPOCH FROM (LEAST("
+            "COALESCE(date_assessed, created_at, now() AT TIME ZONE 'UTC'), "
+            "COALESCE(created_at, now() AT TIME ZONE 'UTC'))"
+            " - TIMESTAMP '2020-01-01')) / 86400.0 / :half_life, 512.0))"
+        )
+    backfill = sa.text(f"""
+        INSERT INTO vendor_score_aggregates
+            (company_id, score_sum, score_count, weighted_score_sum, weight_sum, updated_at)
+        SELECT company_id, SUM(risk_score), COUNT(risk_score), SUM(weight * risk_score), SUM(weight), now()
+        FROM (
+            SELECT company_id, risk_score,
+                   CASE assessment_type
+                       WHEN 'INTERNAL' THEN :internal
+                       WHEN 'EXTERNAL' THEN :external
+                       WHEN 'TIERING' THEN :tiering
+                       ELSE 1.0
+                   END * {decay} AS weight
+            FROM sn_vdr_risk_asmt_assessment
+            WHERE risk_score IS NOT NULL
+        ) AS scored
+        GROUP BY company_id
+    """)
+    params = {
+        'internal': settings.scoring_weight_internal,
+        'external': settings.scoring_weight_external,
+        'tiering': settings.scoring_weight_tiering,
+    }
+    if settings.scoring_half_life_days > 0:
+        params['half_life'] = settings.scoring_half_life_days
+    op.execute(backfill.bindparams(**params))
+
+
+def downgrade() -> None:
+    op.drop_table('vendor_score_aggregates')
@@ -0,0 +1,53 @@
+"""Add foreign key and filter column indexes
+
+Revision ID: 9c4e2a7b1d30
+Revises: 2f3554713968
+Create Date: 2026-10-17 09:12:44.318902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2a7b1d30'
+down_revision: Union[str, None] = '2f3554713968'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_company_contacts_company_id', 'company_contacts', ['company_id']),
+    ('ix_sn_vdr_engagement_company_id', 'sn_vdr_engagement', ['company_id']),
+    ('ix_sn_vdr_risk_asmt_assessment_company_id_date_assessed', 'sn_vdr_risk_asmt_assessment', ['company_id', 'date_assessed']),
+    ('ix_sn_vdr_risk_asmt_assessment_date_assessed_id', 'sn_vdr_risk_asmt_assessment', ['date_assessed', 'id']),
+    ('ix_sn_vdr_risk_asmt_assessment_status', 'sn_vdr_risk_asmt_assessment', ['status']),
+    ('ix_sn_vdr_risk_asmt_assessment_assessor_id', 'sn_vdr_risk_asmt_assessment', ['assessor_id']),
+    ('ix_sn_vdr_risk_asmt_task_company_id_status', 'sn_vdr_risk_asmt_task', ['company_id', 'status']),
+    ('ix_sn_vdr_risk_asmt_task_status_due_date', 'sn_vdr_risk_asmt_task', ['status', 'due_date']),
+    ('ix_sn_vdr_risk_asmt_task_assigned_to_status', 'sn_vdr_risk_asmt_task', ['assigned_to', 'status']),
+    ('ix_sn_vdr_risk_asmt_task_assessment_id', 'sn_vdr_risk_asmt_task', ['assessment_id']),
+    ('ix_sn_tprm_dd_request_company_id_status', 'sn_tprm_dd_request', ['company_id', 'status']),
+    ('ix_sn_tprm_dd_request_status_due_date', 'sn_tprm_dd_request', ['status', 'due_date']),
+    ('ix_sn_tprm_dd_request_request_date_id', 'sn_tprm_dd_request', ['request_date', 'id']),
+    ('ix_sn_tprm_dd_request_assigned_to', 'sn_tprm_dd_request', ['assigned_to']),
+    ('ix_sn_tprm_dd_request_requester_id', 'sn_tprm_dd_request', ['requester_id']),
+    ('ix_documents_company_id_id', 'documents', ['company_id', 'id']),
+    ('ix_documents_company_id_document_type_id', 'documents', ['company_id', 'document_type', 'id']),
+    ('ix_documents_uploaded_by', 'documents', ['uploaded_by']),
+]
+
+
+def upgrade() -> None:
+    # Build concurrently so large tables stay writable during the migration
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
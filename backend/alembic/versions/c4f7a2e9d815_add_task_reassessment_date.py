@@ -0,0 +1,48 @@
+"""Add reassessment_date to tasks
+
+Revision ID: c4f7a2e9d815
+Revises: b8d5f1a3c720
+Create Date: 2026-10-17 22:41:09.127344
+
+Follow-up tasks created so far are recognised by the scheduler's task
+description and marked with the date they were created for (their original
+due_date); if one was ever duplicated, only the oldest copy is marked.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f7a2e9d815'
+down_revision: Union[str, None] = 'b8d5f1a3c720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sn_vdr_risk_asmt_task', sa.Column('reassessment_date', sa.DateTime(), nullable=True))
+    op.execute("""
+        UPDATE sn_vdr_risk_asmt_task
+        SET reassessment_date = due_date
+        WHERE id IN (
+            SELECT MIN(id)
+            FROM sn_vdr_risk_asmt_task
+            WHERE assessment_id IS NOT NULL
+              AND due_date IS NOT NULL
+              AND task_description LIKE 'Reassessment due for assessment #%'
+            GROUP BY assessment_id, due_date
+        )
+    """)
+    op.create_index(
+        'ix_sn_vdr_risk_asmt_task_assessment_id_reassessment_date',
+        'sn_vdr_risk_asmt_task',
+        ['assessment_id', 'reassessment_date'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sn_vdr_risk_asmt_task_assessment_id_reassessment_date', table_name='sn_vdr_risk_asmt_task')
+    op.drop_column('sn_vdr_risk_asmt_task', 'reassessment_date')
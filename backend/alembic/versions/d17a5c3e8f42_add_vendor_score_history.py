@@ -0,0 +1,43 @@
+"""Add vendor_score_history
+
+Revision ID: d17a5c3e8f42
+Revises: 4b8d2e6f1a57
+Create Date: 2026-10-17 14:26:51.207384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd17a5c3e8f42'
+down_revision: Union[str, None] = '4b8d2e6f1a57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'vendor_score_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.Column('risk_score', sa.Float(), nullable=True),
+        sa.Column('weighted_risk_score', sa.Float(), nullable=True),
+        sa.Column('assessment_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['core_company.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_vendor_score_history_company_id_recorded_at',
+        'vendor_score_history',
+        ['company_id', 'recorded_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_vendor_score_history_company_id_recorded_at', table_name='vendor_score_history')
+    op.drop_table('vendor_score_history')
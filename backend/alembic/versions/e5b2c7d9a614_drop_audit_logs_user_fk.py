@@ -0,0 +1,29 @@
+"""Drop the users foreign key from audit_logs
+
+Revision ID: e5b2c7d9a614
+Revises: d17a5c3e8f42
+Create Date: 2026-10-17 16:02:13.418260
+
+Audit rows are written in batches after the request that produced them and
+must outlive the users they name: a batch must not fail because its actor
+was deleted meanwhile, and deleting a user must not be blocked by history.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c7d9a614'
+down_revision: Union[str, None] = 'd17a5c3e8f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('audit_logs_user_id_fkey', 'audit_logs', type_='foreignkey')
+
+
+def downgrade() -> None:
+    op.create_foreign_key('audit_logs_user_id_fkey', 'audit_logs', 'users', ['user_id'], ['id'])
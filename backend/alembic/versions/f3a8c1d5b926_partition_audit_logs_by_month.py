@@ -0,0 +1,100 @@
+"""Partition audit_logs by month
+
+Revision ID: f3a8c1d5b926
+Revises: e5b2c7d9a614
+Create Date: 2026-10-17 17:41:08.902715
+
+PostgreSQL only: audit_logs becomes a table range-partitioned on created_at
+with one partition per month (audit_logs_yYYYYmMM) from the oldest row to
+three months ahead, plus a default partition. Partitioned tables need the
+partition key in the primary key, which becomes (id, created_at); ids keep
+coming from the existing sequence. Existing rows are copied across, so
+expect the upgrade to take a while on a large table. Afterwards keep
+partitions ahead with ``python -m app.cli ensure-audit-partitions``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c1d5b926'
+down_revision: Union[str, None] = 'e5b2c7d9a614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = 'id, user_id, action, resource_type, resource_id, details, ip_address, user_agent, created_at'
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned')
+    op.execute('ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey')
+    op.execute('DROP INDEX ix_audit_logs_id')
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            user_id INTEGER,
+            action VARCHAR(100) NOT NULL,
+            resource_type VARCHAR(100) NOT NULL,
+            resource_id INTEGER,
+            details JSON,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(500),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    # Otherwise the sequence is dropped with the old table
+    op.execute('ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id')
+    op.create_index('ix_audit_logs_id', 'audit_logs', ['id'], unique=False)
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+    op.execute("""
+        DO $$
+        DECLARE
+            partition_month date := date_trunc('month', COALESCE((SELECT min(created_at) FROM audit_logs_unpartitioned), now()));
+            last_month date := date_trunc('month', now()) + interval '3 months';
+        BEGIN
+            WHILE partition_month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                    'audit_logs_y' || to_char(partition_month, 'YYYY"m"MM'), partition_month, partition_month + interval '1 month'
+                );
+                partition_month := partition_month + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+    op.execute(f"""
+        INSERT INTO audit_logs ({COLUMNS})
+        SELECT id, user_id, action, resource_type, resource_id, details, ip_address, user_agent,
+               COALESCE(created_at, now())
+        FROM audit_logs_unpartitioned
+    """)
+    op.execute('DROP TABLE audit_logs_unpartitioned')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_partitioned')
+    op.execute('ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey')
+    op.execute('DROP INDEX ix_audit_logs_id')
+    op.create_table(
+        'audit_logs',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('audit_logs_id_seq')"), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('action', sa.String(length=100), nullable=False),
+        sa.Column('resource_type', sa.String(length=100), nullable=False),
+        sa.Column('resource_id', sa.Integer(), nullable=True),
+        sa.Column('details', sa.JSON(), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('user_agent', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id')
+    op.create_index('ix_audit_logs_id', 'audit_logs', ['id'], unique=False)
+    op.execute(f'INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned')
+    op.execute('DROP TABLE audit_logs_partitioned')
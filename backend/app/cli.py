@@ -0,0 +1,214 @@
+"""
+Operational commands for the TPRM backend.
+
+Run from the backend directory, e.g. ``python -m app.cli check-query-plans``.
+"""
+import asyncio
+import sys
+
+import click
+
+
+@click.group()
+def cli():
+    """ThirdPartyRiskPortal maintenance commands"""
+
+
+@cli.command("check-query-plans")
+@click.option("--verbose", is_flag=True, help="Print the plan of every statement, not just failures")
+def check_query_plans_command(verbose: bool):
+    """
+    Seed an empty database, replay the API routes and fail if any statement
+    falls back to a full table scan.
+
+    Point DATABASE_URL at a scratch database; the command refuses to seed a
+    database that already holds companies.
+    """
+    from .main import app
+    from .services.query_plans import check_query_plans
+
+    results = asyncio.run(check_query_plans(app))
+    failures = [result for result in results if not result.ok]
+
+    for result in results:
+        if verbose or not result.ok:
+            status = "FULL SCAN" if not result.ok else "ok"
+            click.echo(f"[{status}] {' '.join(result.statement.split())}")
+            for line in result.plan:
+                click.echo(f"    {line}")
+
+    click.echo(f"{len(results)} statements checked, {len(failures)} with full table scans")
+    sys.exit(1 if failures else 0)
+
+
+@cli.command("repair-score-aggregates")
+def repair_score_aggregates_command():
+    """
+    Recompute every vendor's running score totals from its assessments.
+
+    Run after deploying the vendor_score_aggregates migration, after changing
+    the scoring_* settings, or whenever the totals are suspected to drift.
+    """
+    from .database import AsyncSessionLocal, async_engine
+    from .services.score_aggregates import repair_score_aggregates
+
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await repair_score_aggregates(db)
+        finally:
+            await async_engine.dispose()
+
+    assessments, vendors = asyncio.run(run())
+    click.echo(f"Rebuilt totals for {vendors} vendors from {assessments} scored assessments")
+
+
+@cli.command("check-score-aggregates")
+def check_score_aggregates_command():
+    """
+    Compare the running score totals with their vendors' assessments and
+    fail if any row has drifted; fix with repair-score-aggregates.
+    """
+    from .database import AsyncSessionLocal, async_engine
+    from .services.score_aggregates import check_score_aggregates
+
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await check_score_aggregates(db)
+        finally:
+            await async_engine.dispose()
+
+    mismatches = asyncio.run(run())
+    for mismatch in mismatches:
+        click.echo(f"company {mismatch.company_id}: stored {mismatch.stored}, expected {mismatch.expected}")
+    click.echo(f"{len(mismatches)} vendors with drifted totals")
+    sys.exit(1 if mismatches else 0)
+
+
+@cli.command("recalculate-tiers")
+@click.option("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+@click.option("--partitions", type=int, default=None, help="Company id ranges to split the portfolio into")
+@click.option("--dry-run", is_flag=True, help="Report tier changes without writing them")
+def recalculate_tiers_command(workers, partitions, dry_run):
+    """
+    Derive every vendor's risk_tier from its scored assessments.
+
+    Uses the scoring_* weights and risk_tier_*_threshold settings. Vendors
+    without scored assessments keep their current tier.
+    """
+    from .services.tier_recalc import recalculate_risk_tiers
+
+    result = recalculate_risk_tiers(workers=workers, partitions=partitions, dry_run=dry_run)
+    click.echo(
+        f"Scored {result.vendors_scored} vendors in {result.partitions} partitions on "
+        f"{result.workers} workers in {result.elapsed_seconds:.1f}s"
+    )
+    for tier, count in sorted(result.changes_by_tier.items()):
+        click.echo(f"    -> {tier}: {count}")
+    verb = "would change" if dry_run else "changed"
+    click.echo(f"{result.vendors_changed} vendors {verb} tier")
+
+
+@cli.command("sweep-overdue")
+def sweep_overdue_command():
+    """Mark open tasks and due diligence requests past their due date OVERDUE."""
+    from .database import AsyncSessionLocal, async_engine
+    from .services.overdue_sweeper import sweep_overdue
+
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await sweep_overdue(db)
+        finally:
+            await async_engine.dispose()
+
+    for table, count in asyncio.run(run()).items():
+        click.echo(f"{table}: {count} marked OVERDUE")
+
+
+@cli.command("ensure-audit-partitions")
+@click.option("--months-ahead", type=int, default=None, help="Months to create beyond the current one")
+def ensure_audit_partitions_command(months_ahead):
+    """
+    Create the monthly audit_logs partitions for the coming months.
+
+    Run from cron (e.g. daily) so inserts never fall back to the default
+    partition. PostgreSQL only.
+    """
+    from .services.audit_partitions import (AuditPartitioningUnavailable,
+                                            ensure_audit_partitions)
+
+    try:
+        created = ensure_audit_partitions(months_ahead=months_ahead)
+    except AuditPartitioningUnavailable as e:
+        raise click.ClickException(str(e))
+    for name in created:
+        click.echo(f"Created {name}")
+    click.echo(f"{len(created)} partitions created")
+
+
+@cli.command("list-audit-partitions")
+@click.option("--archive-dir", default=None, help="Archive directory (default: AUDIT_ARCHIVE_DIR)")
+def list_audit_partitions_command(archive_dir):
+    """List attached audit_logs partitions and archived months."""
+    from .services.audit_partitions import (AuditPartitioningUnavailable,
+                                            list_audit_archives,
+                                            list_audit_partitions)
+
+    try:
+        partitions = list_audit_partitions()
+    except AuditPartitioningUnavailable as e:
+        raise click.ClickException(str(e))
+    for partition in partitions:
+        rows = "?" if partition.estimated_rows is None else f"~{partition.estimated_rows}"
+        click.echo(f"attached  {partition.name}  {rows} rows  {partition.size_bytes // 1024} KiB")
+    for month in list_audit_archives(archive_dir):
+        click.echo(f"archived  {month:%Y-%m}")
+
+
+@cli.command("archive-audit-partitions")
+@click.option("--retention-months", type=int, default=None,
+              help="Months kept in the database (default: AUDIT_RETENTION_MONTHS)")
+@click.option("--archive-dir", default=None, help="Archive directory (default: AUDIT_ARCHIVE_DIR)")
+@click.option("--dry-run", is_flag=True, help="List the partitions that would be archived")
+def archive_audit_partitions_command(retention_months, archive_dir, dry_run):
+    """
+    Export audit_logs partitions past the retention window to gzip NDJSON
+    files, then drop them.
+    """
+    from .services.audit_partitions import (AuditPartitioningUnavailable,
+                                            archive_audit_partitions)
+
+    try:
+        archived = archive_audit_partitions(
+            retention_months=retention_months, archive_dir=archive_dir, dry_run=dry_run
+        )
+    except AuditPartitioningUnavailable as e:
+        raise click.ClickException(str(e))
+    for partition in archived:
+        click.echo(f"{partition.name}: {partition.rows} rows -> {partition.path}")
+    verb = "would be archived" if dry_run else "archived"
+    click.echo(f"{len(archived)} partitions {verb}")
+
+
+@cli.command("restore-audit-partition")
+@click.argument("month", type=click.DateTime(formats=["%Y-%m"]))
+@click.option("--archive-dir", default=None, help="Archive directory (default: AUDIT_ARCHIVE_DIR)")
+def restore_audit_partition_command(month, archive_dir):
+    """
+    Load an archived month (YYYY-MM) back into audit_logs so it can be
+    queried again. The next archive run exports and drops it again.
+    """
+    from .services.audit_partitions import (AuditPartitioningUnavailable,
+                                            restore_audit_partition)
+
+    try:
+        rows = restore_audit_partition(month.date(), archive_dir=archive_dir)
+    except (AuditPartitioningUnavailable, FileNotFoundError, ValueError) as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Restored {rows} rows for {month:%Y-%m}")
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,8 +1,12 @@
 import os
 from typing import Optional
 
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
+# Keeps the decay-anchored score totals usable for decades
+MIN_SCORING_HALF_LIFE_DAYS = 30.0
+
 
 class Settings(BaseSettings):
     # Application
@@ -24,6 +28,19 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Users resolved from tokens are cached per process; the TTL bounds how
+    # long other workers see a changed or deleted user
+    auth_user_cache_maxsize: int = 10000
+    auth_user_cache_ttl_seconds: float = 30.0  # 0 disables the cache
+    # Raising the cost upgrades existing hashes as their users log in
+    password_bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_queue_timeout_seconds: float = 5.0
+    # Revoked token ids (jti) are mirrored into a per-process Bloom filter
+    # that picks up other workers' revocations every refresh interval
+    token_revocation_refresh_seconds: float = 5.0  # 0 checks the database every time
+    token_revocation_bloom_capacity: int = 100000
+    token_revocation_bloom_error_rate: float = 0.001
     
     # Azure Storage
     azure_storage_connection_string: Optional[str] = None
@@ -58,9 +75,81 @@ class Settings(BaseSettings):
         "image/png"
     ]
     
+    # Risk scoring
+    scoring_weight_internal: float = 1.0
+    scoring_weight_external: float = 1.5
+    scoring_weight_tiering: float = 0.5
+    # 0 disables time decay; shorter half-lives outgrow the stored weighted
+    # totals sooner (see services.score_aggregates)
+    scoring_half_life_days: float = 365.0
+    # Lowest score in each tier; anything below the MEDIUM threshold is LOW
+    risk_tier_medium_threshold: float = 25.0
+    risk_tier_high_threshold: float = 50.0
+    risk_tier_critical_threshold: float = 75.0
+    
+    # Background jobs
+    reassessment_scheduler_enabled: bool = True
+    reassessment_task_due_days: float = 14.0  # time given to complete a follow-up task
+    overdue_sweep_interval_seconds: float = 300.0  # 0 disables the sweeper
+    score_cache_maxsize: int = 10000
+    score_cache_ttl_seconds: float = 300.0
+    
+    # Audit log
+    audit_queue_maxsize: int = 10000
+    audit_batch_size: int = 500
+    audit_flush_interval_ms: float = 200.0
+    audit_shutdown_timeout_seconds: float = 10.0
+    audit_partition_months_ahead: int = 3
+    audit_retention_months: int = 12  # months kept in the database before archiving
+    audit_archive_dir: str = "audit_archive"
+    
+    # Rate limiting: token buckets written "<requests>/<second|minute|hour>",
+    # per user for bearer-token requests and per client IP otherwise
+    rate_limit_enabled: bool = True
+    rate_limit_default: str = "600/minute"
+    rate_limit_auth: str = "10/minute"
+    rate_limit_uploads: str = "60/minute"
+    # A redis:// URL shares buckets between workers (needs the redis
+    # package); empty keeps them per process
+    rate_limit_redis_url: str = ""
+    rate_limit_memory_max_keys: int = 100000
+    
+    # Metrics
+    metrics_enabled: bool = True  # serves GET /metrics for Prometheus
+    # SQL statements and database time per request go into the request log
+    # and, when enabled, a Server-Timing response header
+    sql_server_timing_enabled: bool = True
+    # Warn when a request runs the same statement more than this many times
+    # (likely an N+1 query); 0 turns the check off
+    sql_n_plus_one_threshold: int = 0
+    # Statements slower than this are logged and kept, with their EXPLAIN
+    # plan, for GET /admin/slow-queries; 0 turns the recorder off
+    slow_query_threshold_ms: float = 500.0
+    slow_query_buffer_size: int = 200
+    slow_query_explain: bool = True
+    # Admins can profile one request by sending "X-Profile: 1"; the newest
+    # profile_max_files are kept
+    profiling_enabled: bool = True
+    profile_dir: str = "profiles"
+    profile_max_files: int = 50
+    profile_interval_seconds: float = 0.001
+    
     # Logging
     log_level: str = "INFO"
     log_format: str = "json"
+    # Server errors and requests slower than log_slow_request_ms are always
+    # logged, other requests at log_request_sample_rate (1 logs every one)
+    log_request_sample_rate: float = 0.1
+    log_slow_request_ms: float = 1000.0
+    # Records waiting for the log writer thread; more are dropped
+    log_queue_maxsize: int = 10000
+    
+    @field_validator("scoring_half_life_days")
+    @classmethod
+    def validate_scoring_half_life_days(cls, value: float) -> float:
+        if value != 0 and value < MIN_SCORING_HALF_LIFE_DAYS:
+            raise ValueError(f"must be 0 or at least {MIN_SCORING_HALF_LIFE_DAYS} days")
+        return value
     
     class Config:
         env_file = ".env"
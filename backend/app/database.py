@@ -1,17 +1,52 @@
 import logging
+import time
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 
 from .config import settings
+from .metrics import db_pool_checkout_seconds, db_pool_connections, registry
+from .slow_queries import slow_query_log
 
 logger = logging.getLogger(__name__)
 
 # Debug logging
 logger.info(f"Connecting to database: {settings.database_url}")
 
+
+def get_async_database_url(database_url: str) -> str:
+    """Map a sync database URL onto its async driver (asyncpg / aiosqlite)"""
+    if database_url.startswith("sqlite:"):
+        return database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if database_url.startswith("postgresql+psycopg2:"):
+        return database_url.replace("postgresql+psycopg2:", "postgresql+asyncpg:", 1)
+    if database_url.startswith("postgresql:"):
+        return database_url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return database_url
+
+
+class _TimedCheckout:
+    """Pool mixin recording how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_seconds.observe(time.perf_counter() - started)
+
+
+class TimedStaticPool(_TimedCheckout, StaticPool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
 # Database engine configuration
 if settings.database_url.startswith("sqlite"):
     # SQLite configuration for development
@@ -21,6 +56,12 @@ if settings.database_url.startswith("sqlite"):
         poolclass=StaticPool,
         echo=settings.debug
     )
+    async_engine = create_async_engine(
+        get_async_database_url(settings.database_url),
+        connect_args={"check_same_thread": False},
+        poolclass=TimedStaticPool,
+        echo=settings.debug
+    )
 else:
     # PostgreSQL configuration for production
     engine = create_engine(
@@ -29,30 +70,59 @@ else:
         pool_recycle=300,
         echo=settings.debug
     )
+    async_engine = create_async_engine(
+        get_async_database_url(settings.database_url),
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        echo=settings.debug
+    )
 
-# Session factory
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Slow statements on either engine are kept for GET /admin/slow-queries;
+# EXPLAIN plans are captured for the async engine's
+slow_query_log.install(engine)
+slow_query_log.install(async_engine.sync_engine, async_engine)
+
+def _collect_pool_metrics():
+    pool = async_engine.pool
+    if isinstance(pool, QueuePool):
+        db_pool_connections.set("checked_out", value=pool.checkedout())
+        db_pool_connections.set("idle", value=pool.checkedin())
+        db_pool_connections.set("overflow", value=max(pool.overflow(), 0))
+
+registry.add_collector(_collect_pool_metrics)
 
 # Base class for models
 Base = declarative_base()
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
-        yield db
-    except Exception as e:
-        logger.error(f"Database session error: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
+async def get_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await db.rollback()
+            raise
 
-def init_db():
+async def init_db():
     """Initialize database tables"""
     try:
-        Base.metadata.create_all(bind=engine)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Failed to create database tables: {e}")
-        raise
\ No newline at end of file
+        raise
+
+async def close_db():
+    """Dispose of pooled async connections on shutdown"""
+    await async_engine.dispose()
@@ -0,0 +1,116 @@
+"""
+Logging setup: structlog in front, the actual I/O on a background thread.
+
+configure_logging() routes every record, structlog's and the stdlib loggers'
+alike, through a QueueHandler on the root logger. A request only puts the
+record on a bounded in-memory queue; a QueueListener thread renders it (JSON
+or console, per LOG_FORMAT) and writes it to stdout. When the writer falls
+behind and the queue is full, records are dropped and counted rather than
+blocking the event loop.
+
+Request logging is sampled; see should_log_request().
+"""
+import atexit
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+import structlog
+
+from .config import settings
+
+_listener: Optional[QueueListener] = None
+_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in this process, so the record can be passed as
+        # it is and formatted there, off the request path
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging() -> None:
+    """Configure structlog and the root logger; safe to call more than once"""
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    shared_processors = [
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.processors.TimeStamper(fmt="iso"),
+    ]
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            *shared_processors,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    if settings.log_format == "json":
+        renderer = structlog.processors.JSONRenderer()
+    else:
+        renderer = structlog.dev.ConsoleRenderer(colors=False)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(structlog.stdlib.ProcessorFormatter(
+        processors=[structlog.stdlib.ProcessorFormatter.remove_processors_meta, renderer],
+        # Records from plain logging.getLogger() loggers
+        foreign_pre_chain=shared_processors,
+    ))
+
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.log_queue_maxsize))
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(settings.log_level.upper())
+
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    # Write out whatever is still queued when the process exits
+    atexit.register(_listener.stop)
+
+
+def should_log_request(status_code: int, duration_ms: float) -> bool:
+    """
+    Whether to log a completed request: always for server errors and
+    requests slower than log_slow_request_ms, otherwise for a random
+    log_request_sample_rate share of them
+    """
+    if status_code >= 500 or duration_ms >= settings.log_slow_request_ms:
+        return True
+    return random.random() < settings.log_request_sample_rate
+
+
+def logging_stats() -> Dict[str, Any]:
+    if _handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "queue_depth": _handler.queue.qsize(),
+        "queue_maxsize": _handler.queue.maxsize,
+        "dropped": _handler.dropped,
+    }
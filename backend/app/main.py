@@ -1,40 +1,46 @@
 import logging
+import re
 import time
+import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
 import structlog
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from .config import settings
-from .database import init_db
-from .routers import (assessments, auth, company, due_diligence, engagement,
-                      files, scoring, tasks, users)
+from .database import async_engine, close_db, init_db
+from .logging_config import configure_logging, should_log_request
+from .metrics import MetricsMiddleware, registry
+from .profiling import ProfilingMiddleware
+from .rate_limit import RateLimitMiddleware, rate_limiter
+from .routers import (admin, assessments, audit, auth, company,
+                      due_diligence, engagement, files, scoring, tasks, users)
+from .services.audit import audit_writer
+from .services.audit_partitions import (AuditPartitioningUnavailable,
+                                        ensure_audit_partitions)
+from .services.overdue_sweeper import overdue_sweeper
+from .services.password_hashing import PasswordHashingBusy, password_hasher
+from .services.reassessment_scheduler import reassessment_scheduler
+from .services.token_revocation import token_revocation_list
+from .sql_stats import (finish_request, install_sql_stats,
+                        repeated_statements, server_timing, start_request)
 
 # API Configuration
 API_V1_PREFIX = "/api/v1"
 
+# Inbound correlation IDs are echoed back only if they look like one
+CORRELATION_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
 # Configure structured logging
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
-    ],
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
-    cache_logger_on_first_use=True,
-)
+configure_logging()
+
+# Count SQL statements per request
+install_sql_stats(async_engine)
 
 logger = structlog.get_logger()
 
@@ -44,16 +50,38 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting ThirdPartyRiskPortal application")
     try:
-        init_db()
+        await init_db()
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
+    try:
+        await run_in_threadpool(ensure_audit_partitions)
+    except AuditPartitioningUnavailable as e:
+        logger.info(f"Audit log partitioning skipped: {e}")
+    except Exception as e:
+        # Rows fall into the default partition until this succeeds
+        logger.error(f"Failed to create audit log partitions: {e}")
+    audit_writer.start()
+    if settings.token_revocation_refresh_seconds > 0:
+        await token_revocation_list.start()
+    if settings.reassessment_scheduler_enabled:
+        await reassessment_scheduler.start()
+    if settings.overdue_sweep_interval_seconds > 0:
+        overdue_sweeper.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down ThirdPartyRiskPortal application")
+    await overdue_sweeper.stop()
+    await reassessment_scheduler.stop()
+    await token_revocation_list.stop()
+    # Flush queued audit events while the engine is still open
+    await audit_writer.stop(timeout=settings.audit_shutdown_timeout_seconds)
+    password_hasher.shutdown()
+    await rate_limiter.close()
+    await close_db()
 
 # Create FastAPI application
 app = FastAPI(
@@ -65,6 +93,29 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# On-demand profiling for admins; innermost, so it profiles the route itself
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profile_dir=settings.profile_dir,
+        max_files=settings.profile_max_files,
+        interval=settings.profile_interval_seconds,
+    )
+
+# Rate limiting; added before everything but profiling, so it runs after
+# CORS and request logging, which then also see its 429 responses
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=rate_limiter,
+    prefix=API_V1_PREFIX,
+    default=settings.rate_limit_default,
+    rules={
+        f"{API_V1_PREFIX}/auth/token": settings.rate_limit_auth,
+        f"{API_V1_PREFIX}/auth/login": settings.rate_limit_auth,
+        f"{API_V1_PREFIX}/files/upload-url": settings.rate_limit_uploads,
+    },
+)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -84,51 +135,81 @@ if not settings.debug:
 # Request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all requests with timing and correlation ID"""
-    start_time = time.time()
+    """Log sampled requests with timing and correlation ID"""
+    start_time = time.perf_counter()
     
-    # Generate correlation ID
-    correlation_id = request.headers.get("X-Correlation-ID", f"req-{int(start_time * 1000)}")
+    # Keep the caller's correlation ID, or generate one
+    correlation_id = request.headers.get("X-Correlation-ID", "")
+    if not CORRELATION_ID_PATTERN.match(correlation_id):
+        correlation_id = uuid.uuid4().hex
     
     # Add correlation ID to request state
     request.state.correlation_id = correlation_id
-    
-    # Log request
-    logger.info(
-        "Incoming request",
-        correlation_id=correlation_id,
-        method=request.method,
-        url=str(request.url),
-        client_ip=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent")
-    )
+    sql_stats, sql_stats_token = start_request(correlation_id, request.scope)
     
     try:
         response = await call_next(request)
         
-        # Log response
-        process_time = time.time() - start_time
-        logger.info(
-            "Request completed",
-            correlation_id=correlation_id,
-            status_code=response.status_code,
-            process_time=round(process_time, 4)
-        )
+        process_time = time.perf_counter() - start_time
+        for statement, count in repeated_statements(sql_stats):
+            logger.warning(
+                "Repeated SQL statement, possible N+1 query",
+                correlation_id=correlation_id,
+                method=request.method,
+                path=request.url.path,
+                statement=statement,
+                count=count
+            )
+        
+        # Log response, if sampled
+        if should_log_request(response.status_code, process_time * 1000):
+            logger.info(
+                "Request completed",
+                correlation_id=correlation_id,
+                method=request.method,
+                path=request.url.path,
+                status_code=response.status_code,
+                process_time=round(process_time, 4),
+                db_queries=sql_stats.statements,
+                db_time=round(sql_stats.seconds, 4),
+                client_ip=request.client.host if request.client else None,
+                user_agent=request.headers.get("user-agent")
+            )
         
         # Add correlation ID to response headers
         response.headers["X-Correlation-ID"] = correlation_id
+        if settings.sql_server_timing_enabled:
+            response.headers.append("Server-Timing", server_timing(sql_stats))
         return response
         
     except Exception as e:
         # Log error
-        process_time = time.time() - start_time
+        process_time = time.perf_counter() - start_time
         logger.error(
             "Request failed",
             correlation_id=correlation_id,
+            method=request.method,
+            path=request.url.path,
             error=str(e),
-            process_time=round(process_time, 4)
+            process_time=round(process_time, 4),
+            db_queries=sql_stats.statements
         )
         raise
+    finally:
+        finish_request(sql_stats_token)
+
+# Metrics; added last so it runs outermost and times everything above
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    """Shed logins and password changes while every hashing worker is busy"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -164,6 +245,8 @@ app.include_router(tasks.router, prefix=API_V1_PREFIX)
 app.include_router(due_diligence.router, prefix=API_V1_PREFIX)
 app.include_router(files.router, prefix=API_V1_PREFIX)
 app.include_router(scoring.router, prefix=API_V1_PREFIX)
+app.include_router(audit.router, prefix=API_V1_PREFIX)
+app.include_router(admin.router, prefix=API_V1_PREFIX)
 
 # Health check endpoint
 @app.get("/health")
@@ -176,6 +259,13 @@ async def health_check():
         "environment": "development" if settings.debug else "production"
     }
 
+# Prometheus scrape endpoint
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Metrics in the Prometheus text exposition format"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Root endpoint
 @app.get("/")
 async def root():
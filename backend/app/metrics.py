@@ -0,0 +1,253 @@
+"""
+Prometheus metrics, rendered by GET /metrics in the text exposition format.
+
+The metric types here are deliberately minimal instead of prometheus_client:
+recording is a dict lookup and a few integer/float additions, with no lock.
+That is safe because everything is recorded on the event loop thread (the
+request middleware, async-engine pool checkouts, Azure Storage and Dapr
+calls made from async routes). A metric recorded from worker threads could
+occasionally lose an increment under contention, which is acceptable for
+monitoring but should be kept off anything that needs exact counts.
+
+Request metrics are labelled with the route template
+(``/api/v1/companies/{company_id}``) that FastAPI stores in scope["route"],
+never the raw path, so the number of series stays bounded. Requests that
+match no route (404s, and 429s from the rate limiter, which runs before
+routing) share the UNMATCHED_ROUTE label.
+"""
+import functools
+import inspect
+import math
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Outcome of the tracked external call in progress, as a one-element list
+_external_call: ContextVar[Optional[List[str]]] = ContextVar("external_call", default=None)
+
+# Upper bounds in seconds
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (not cumulative), +Inf bucket, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                bucket_label = f'le="{_format_value(float(bound))}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, bucket_label)} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        # Called before every render to refresh gauges sampled on scrape
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry instance
+registry = Registry()
+
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests being served", ["method"],
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request duration by route template", ["method", "route", "status"],
+))
+db_pool_checkout_seconds = registry.register(Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled database connection", buckets=POOL_CHECKOUT_BUCKETS,
+))
+db_pool_connections = registry.register(Gauge(
+    "db_pool_connections", "Async engine pool connections by state", ["state"],
+))
+external_calls_total = registry.register(Counter(
+    "external_calls_total", "Calls to external services", ["service", "operation", "outcome"],
+))
+external_call_duration_seconds = registry.register(Histogram(
+    "external_call_duration_seconds", "Duration of calls to external services", ["service", "operation"],
+))
+
+
+def set_external_call_outcome(outcome: str) -> None:
+    """
+    Set the outcome recorded for the tracked call in progress, for wrappers
+    that handle a failure themselves instead of raising ("error"), or that
+    return without calling the service ("skipped")
+    """
+    call = _external_call.get()
+    if call is not None:
+        call[0] = outcome
+
+
+def track_external_call(service: str) -> Callable:
+    """
+    Decorator counting and timing calls to an external service; works on
+    sync and async methods. A call that raises counts as an error, one that
+    returns as a success unless it set another outcome with
+    set_external_call_outcome().
+    """
+    def decorator(fn: Callable) -> Callable:
+        operation = fn.__name__
+
+        def record(started: float, outcome: str) -> None:
+            external_calls_total.inc(service, operation, outcome)
+            external_call_duration_seconds.observe(time.perf_counter() - started, service, operation)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                call = ["success"]
+                token = _external_call.set(call)
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    record(started, "error")
+                    raise
+                finally:
+                    _external_call.reset(token)
+                record(started, call[0])
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            call = ["success"]
+            token = _external_call.set(call)
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                record(started, "error")
+                raise
+            finally:
+                _external_call.reset(token)
+            record(started, call[0])
+            return result
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording in-flight requests and request durations"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        http_requests_in_progress.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec(method)
+            # The router has put the matched route into the same scope
+            route = scope.get("route")
+            template = getattr(route, "path_format", None) or UNMATCHED_ROUTE
+            http_request_duration_seconds.observe(time.perf_counter() - started, method, template, status)
@@ -1,10 +1,11 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional
 
 from sqlalchemy import (JSON, Boolean, Column, DateTime, Float, ForeignKey,
-                        Integer, String, Text)
+                        Index, Integer, String, Text)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 
 from .database import Base
 
@@ -15,6 +16,22 @@ CORE_USERS_ID = "users.id"
 RISK_TIER_PATTERN = "^(LOW|MEDIUM|HIGH|CRITICAL)$"
 
 
+class UTCDateTime(TypeDecorator):
+    """
+    Naive UTC timestamp column.
+
+    The schema uses TIMESTAMP WITHOUT TIME ZONE; asyncpg refuses aware
+    datetimes for those columns, so aware values are normalised to UTC.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
 # SQLAlchemy Models
 class Company(Base):
     __tablename__ = "core_company"
@@ -25,8 +42,8 @@ class Company(Base):
     country = Column(String(100))
     risk_tier = Column(String(50), default="MEDIUM")
     status = Column(String(50), default="ACTIVE")
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_at = Column(UTCDateTime, default=func.now())
+    updated_at = Column(UTCDateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     assessments = relationship("ThirdPartyRiskAssessment", back_populates="company", cascade=CASCADE_ALL_DELETE_ORPHAN)
@@ -35,6 +52,8 @@ class Company(Base):
     documents = relationship("Document", back_populates="company", cascade=CASCADE_ALL_DELETE_ORPHAN)
     contacts = relationship("CompanyContact", back_populates="company", cascade=CASCADE_ALL_DELETE_ORPHAN)
     contacts = relationship("CompanyContact", back_populates="company", cascade=CASCADE_ALL_DELETE_ORPHAN)
+    score_aggregate = relationship("VendorScoreAggregate", uselist=False, cascade=CASCADE_ALL_DELETE_ORPHAN)
+    score_history = relationship("VendorScoreHistory", cascade=CASCADE_ALL_DELETE_ORPHAN)
 
 class CompanyContact(Base):
     __tablename__ = "company_contacts"
@@ -46,25 +65,33 @@ class CompanyContact(Base):
     phone = Column(String(50))
     role = Column(String(100))
     is_primary = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=func.now())
+    created_at = Column(UTCDateTime, default=func.now())
     
     company = relationship("Company", back_populates="contacts")
 
+    __table_args__ = (
+        Index("ix_company_contacts_company_id", "company_id"),
+    )
+
 class Engagement(Base):
     __tablename__ = "sn_vdr_engagement"
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     description = Column(Text)
-    start_date = Column(DateTime)
-    end_date = Column(DateTime)
+    start_date = Column(UTCDateTime)
+    end_date = Column(UTCDateTime)
     status = Column(String(50), default="ACTIVE")
     company_id = Column(Integer, ForeignKey(CORE_COMPANY_ID), nullable=False)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_at = Column(UTCDateTime, default=func.now())
+    updated_at = Column(UTCDateTime, default=func.now(), onupdate=func.now())
     
     company = relationship("Company")
 
+    __table_args__ = (
+        Index("ix_sn_vdr_engagement_company_id", "company_id"),
+    )
+
 class ThirdPartyRiskAssessment(Base):
     __tablename__ = "sn_vdr_risk_asmt_assessment"
     
@@ -72,50 +99,111 @@ class ThirdPartyRiskAssessment(Base):
     risk_score = Column(Float)
     risk_level = Column(String(50))
     assessment_type = Column(String(100))  # INTERNAL, EXTERNAL, TIERING
-    date_assessed = Column(DateTime, default=func.now())
-    next_assessment_date = Column(DateTime)
+    date_assessed = Column(UTCDateTime, default=func.now())
+    next_assessment_date = Column(UTCDateTime)
     status = Column(String(50), default="PENDING")
     company_id = Column(Integer, ForeignKey(CORE_COMPANY_ID), nullable=False)
     assessor_id = Column(Integer, ForeignKey(CORE_USERS_ID))
     notes = Column(Text)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_at = Column(UTCDateTime, default=func.now())
+    updated_at = Column(UTCDateTime, default=func.now(), onupdate=func.now())
     
     company = relationship("Company", back_populates="assessments")
 
+    __table_args__ = (
+        Index("ix_sn_vdr_risk_asmt_assessment_company_id_date_assessed", "company_id", "date_assessed"),
+        Index("ix_sn_vdr_risk_asmt_assessment_date_assessed_id", "date_assessed", "id"),
+        Index("ix_sn_vdr_risk_asmt_assessment_status", "status"),
+        Index("ix_sn_vdr_risk_asmt_assessment_assessor_id", "assessor_id"),
+    )
+
+class VendorScoreAggregate(Base):
+    """
+    Running score totals per vendor, maintained alongside assessment writes
+
+    weighted_score_sum and weight_sum hold type-weighted, decay-anchored
+    terms (see services.score_aggregates); their ratio is the weighted,
+    time-decayed score at any point in time.
+    """
+    __tablename__ = "vendor_score_aggregates"
+    
+    company_id = Column(Integer, ForeignKey(CORE_COMPANY_ID), primary_key=True)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    score_count = Column(Integer, nullable=False, default=0)
+    weighted_score_sum = Column(Float, nullable=False, default=0.0)
+    weight_sum = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(UTCDateTime, default=func.now(), onupdate=func.now())
+
+class VendorScoreHistory(Base):
+    """Snapshot of a vendor's scores, recorded whenever they change"""
+    __tablename__ = "vendor_score_history"
+    
+    id = Column(Integer, primary_key=True)
+    company_id = Column(Integer, ForeignKey(CORE_COMPANY_ID), nullable=False)
+    recorded_at = Column(UTCDateTime, nullable=False, default=func.now())
+    risk_score = Column(Float)  # NULL once the vendor has no scored assessments
+    weighted_risk_score = Column(Float)
+    assessment_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_vendor_score_history_company_id_recorded_at", "company_id", "recorded_at"),
+    )
+
 class Task(Base):
     __tablename__ = "sn_vdr_risk_asmt_task"
     
     id = Column(Integer, primary_key=True, index=True)
     task_description = Column(Text, nullable=False)
     assigned_to = Column(String(255))
-    due_date = Column(DateTime)
+    due_date = Column(UTCDateTime)
     status = Column(String(50), default="PENDING")  # PENDING, IN_PROGRESS, COMPLETED, OVERDUE
     priority = Column(String(50), default="MEDIUM")  # LOW, MEDIUM, HIGH, CRITICAL
     company_id = Column(Integer, ForeignKey(CORE_COMPANY_ID), nullable=False)
     assessment_id = Column(Integer, ForeignKey("sn_vdr_risk_asmt_assessment.id"))
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    # Set only on reassessment follow-ups: the next_assessment_date they were
+    # created for. Not editable through the API, unlike due_date.
+    reassessment_date = Column(UTCDateTime)
+    created_at = Column(UTCDateTime, default=func.now())
+    updated_at = Column(UTCDateTime, default=func.now(), onupdate=func.now())
     
     company = relationship("Company", back_populates="tasks")
 
+    __table_args__ = (
+        Index("ix_sn_vdr_risk_asmt_task_company_id_status", "company_id", "status"),
+        Index("ix_sn_vdr_risk_asmt_task_status_due_date", "status", "due_date"),
+        Index("ix_sn_vdr_risk_asmt_task_assigned_to_status", "assigned_to", "status"),
+        Index("ix_sn_vdr_risk_asmt_task_assessment_id", "assessment_id"),
+        Index(
+            "ix_sn_vdr_risk_asmt_task_assessment_id_reassessment_date",
+            "assessment_id", "reassessment_date", unique=True,
+        ),
+    )
+
 class DueDiligenceRequest(Base):
     __tablename__ = "sn_tprm_dd_request"
     
     id = Column(Integer, primary_key=True, index=True)
     request_details = Column(Text, nullable=False)
-    request_date = Column(DateTime, default=func.now())
+    request_date = Column(UTCDateTime, default=func.now())
     status = Column(String(50), default="PENDING")  # PENDING, APPROVED, REJECTED, COMPLETED
     priority = Column(String(50), default="MEDIUM")
-    due_date = Column(DateTime)
+    due_date = Column(UTCDateTime)
     company_id = Column(Integer, ForeignKey(CORE_COMPANY_ID), nullable=False)
     requester_id = Column(Integer, ForeignKey(CORE_USERS_ID))
     assigned_to = Column(Integer, ForeignKey(CORE_USERS_ID))
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_at = Column(UTCDateTime, default=func.now())
+    updated_at = Column(UTCDateTime, default=func.now(), onupdate=func.now())
     
     company = relationship("Company", back_populates="due_diligence_requests")
 
+    __table_args__ = (
+        Index("ix_sn_tprm_dd_request_company_id_status", "company_id", "status"),
+        Index("ix_sn_tprm_dd_request_status_due_date", "status", "due_date"),
+        Index("ix_sn_tprm_dd_request_request_date_id", "request_date", "id"),
+        Index("ix_sn_tprm_dd_request_assigned_to", "assigned_to"),
+        Index("ix_sn_tprm_dd_request_requester_id", "requester_id"),
+    )
+
 class Document(Base):
     __tablename__ = "documents"
     
@@ -125,7 +213,7 @@ class Document(Base):
     blob_name = Column(String(255), nullable=False)
     content_type = Column(String(100))
     file_size = Column(Integer)
-    upload_date = Column(DateTime, default=func.now())
+    upload_date = Column(UTCDateTime, default=func.now())
     company_id = Column(Integer, ForeignKey(CORE_COMPANY_ID), nullable=False)
     uploaded_by = Column(Integer, ForeignKey(CORE_USERS_ID))
     document_type = Column(String(100))  # CONTRACT, ASSESSMENT, COMPLIANCE, etc.
@@ -134,6 +222,12 @@ class Document(Base):
     
     company = relationship("Company", back_populates="documents")
 
+    __table_args__ = (
+        Index("ix_documents_company_id_id", "company_id", "id"),
+        Index("ix_documents_company_id_document_type_id", "company_id", "document_type", "id"),
+        Index("ix_documents_uploaded_by", "uploaded_by"),
+    )
+
 class User(Base):
     __tablename__ = "users"
     
@@ -144,8 +238,8 @@ class User(Base):
     full_name = Column(String(255))
     role = Column(String(50), default="USER")  # ADMIN, ASSESSOR, APPROVER, USER
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=func.now())
-    last_login = Column(DateTime)
+    created_at = Column(UTCDateTime, default=func.now())
+    last_login = Column(UTCDateTime)
     
     # Relationships
     assessments = relationship("ThirdPartyRiskAssessment", foreign_keys="ThirdPartyRiskAssessment.assessor_id")
@@ -157,11 +251,32 @@ class AuditLog(Base):
     __tablename__ = "audit_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey(CORE_USERS_ID))
+    # No foreign key: audit rows outlive the users they name
+    user_id = Column(Integer)
     action = Column(String(100), nullable=False)
     resource_type = Column(String(100), nullable=False)
     resource_id = Column(Integer)
     details = Column(JSON)
     ip_address = Column(String(45))
     user_agent = Column(String(500))
-    created_at = Column(DateTime, default=func.now())
\ No newline at end of file
+    # Partition key on PostgreSQL, where the primary key is (id, created_at)
+    created_at = Column(UTCDateTime, default=func.now(), nullable=False)
+
+    # Trailing id: the audit trail is paged newest-first on (created_at, id)
+    __table_args__ = (
+        Index("ix_audit_logs_resource_type_resource_id_created_at_id", "resource_type", "resource_id", "created_at", "id"),
+        Index("ix_audit_logs_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+    )
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # The token's jti claim
+    jti = Column(String(64), primary_key=True)
+    # No foreign key: a revocation must outlive a deleted user's tokens
+    user_id = Column(Integer)
+    # Rows are useless once the token itself has expired and are purged
+    expires_at = Column(UTCDateTime, nullable=False, index=True)
+    # Workers read new revocations incrementally on revoked_at
+    revoked_at = Column(UTCDateTime, nullable=False, default=func.now(), index=True)
\ No newline at end of file
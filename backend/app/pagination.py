@@ -0,0 +1,126 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered on ``(sort_key, id)`` and the cursor carries the last row's
+values for both columns, so fetching page N costs the same index range scan
+as fetching page 1. Cursors are opaque to clients: base64-encoded JSON that
+also pins the sort key, so a cursor cannot be replayed against another order.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Query
+from sqlalchemy import DateTime, Select, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+INVALID_CURSOR = "Invalid pagination cursor"
+
+
+class PageParams:
+    """Common query parameters for paginated list routes"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        sort: str = Query("id", description="Sort key; prefix with '-' for descending order"),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.sort = sort
+
+
+def encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    """Encode the position after a row as an opaque cursor string"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort, "v": value, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """Decode a cursor produced by encode_cursor for the given sort key"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != sort or not isinstance(payload["id"], int):
+            raise ValueError("cursor does not match sort key")
+        return payload["v"], payload["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail=INVALID_CURSOR)
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    id_column,
+    sort_columns: Dict[str, Any],
+    params: PageParams,
+) -> Dict[str, Any]:
+    """
+    Apply keyset pagination to a select() of ORM entities
+
+    Args:
+        db: Async database session
+        query: Base select, with any filters already applied
+        id_column: Unique tie-breaker column (the primary key)
+        sort_columns: Allowed sort keys mapped to their columns
+        params: Cursor, limit and sort from the request
+
+    Returns:
+        Dict with ``items`` and ``next_cursor`` (None on the last page)
+    """
+    descending = params.sort.startswith("-")
+    sort_key = params.sort.lstrip("-")
+    if sort_key not in sort_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort key {sort_key}. Valid keys: {sorted(sort_columns)}"
+        )
+    sort_column = sort_columns[sort_key]
+    single_key = sort_column is id_column
+
+    if params.cursor:
+        value, last_id = decode_cursor(params.cursor, params.sort)
+        # Unwrap TypeDecorators such as models.UTCDateTime
+        column_type = getattr(sort_column.type, "impl", sort_column.type)
+        if isinstance(column_type, DateTime) and value is not None:
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail=INVALID_CURSOR)
+        if single_key:
+            query = query.where(id_column < last_id if descending else id_column > last_id)
+        else:
+            position = tuple_(sort_column, id_column)
+            bound = tuple_(literal(value, sort_column.type), last_id)
+            query = query.where(position < bound if descending else position > bound)
+            if value is not None:
+                # Implied by the row comparison, but usable on its own for
+                # index range bounds and partition pruning
+                query = query.where(sort_column <= value if descending else sort_column >= value)
+
+    order = [sort_column.desc() if descending else sort_column.asc()]
+    if not single_key:
+        order.append(id_column.desc() if descending else id_column.asc())
+    query = query.order_by(*order).limit(params.limit + 1)
+
+    result = await db.execute(query)
+    items: List[Any] = list(result.scalars().all())
+
+    next_cursor = None
+    if len(items) > params.limit:
+        items = items[:params.limit]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            params.sort,
+            getattr(last, sort_column.key),
+            getattr(last, id_column.key),
+        )
+    return {"items": items, "next_cursor": next_cursor}
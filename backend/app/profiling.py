@@ -0,0 +1,193 @@
+"""
+On-demand profiling of single requests.
+
+An admin sends ``X-Profile: 1`` with an otherwise normal request. The
+request then runs under pyinstrument's sampling profiler and the profile is
+written to PROFILE_DIR in speedscope format, a flamegraph-compatible JSON
+file that https://www.speedscope.app opens directly. The response carries
+X-Profile-Id; GET /admin/profiles lists stored profiles and
+GET /admin/profiles/{id} downloads one. Only the newest PROFILE_MAX_FILES
+are kept.
+
+Without the header the middleware only scans the request headers, so it
+costs nothing measurable. With it, the bearer token must pass the same
+checks as an admin-only route (get_current_user, then require_admin), so
+revoked tokens and deactivated or demoted users are refused; the request
+itself is still authorized by its route as usual. pyinstrument is in
+requirements.txt but imported only when a profile is requested; where it is
+missing the request runs unprofiled and the response says so in
+X-Profile-Error. One request is profiled at a time.
+"""
+import logging
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .database import AsyncSessionLocal
+from .security import get_current_user, require_admin
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_SUFFIX = ".speedscope.json"
+PROFILE_ID_PATTERN = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+
+
+@dataclass
+class StoredProfile:
+    id: str
+    method: str
+    route: str
+    size_bytes: int
+    created_at: datetime
+
+
+def _requested(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.lower() in (b"1", b"true")
+    return False
+
+
+def _bearer_token(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" and token else None
+    return None
+
+
+async def _is_admin(scope: Scope) -> bool:
+    """Whether the request's bearer token would pass an admin-only route"""
+    token = _bearer_token(scope)
+    if token is None:
+        return False
+    async with AsyncSessionLocal() as db:
+        try:
+            await require_admin(await get_current_user(token, db))
+        except HTTPException:
+            return False
+    return True
+
+
+def _route_slug(scope: Scope) -> str:
+    template = getattr(scope.get("route"), "path_format", None) or scope["path"]
+    return re.sub(r"[^A-Za-z0-9]+", "-", template).strip("-")[:100] or "root"
+
+
+def list_profiles(profile_dir: str) -> List[StoredProfile]:
+    """Stored profiles, newest first"""
+    if not os.path.isdir(profile_dir):
+        return []
+    profiles = []
+    for filename in os.listdir(profile_dir):
+        if not filename.endswith(PROFILE_SUFFIX):
+            continue
+        profile_id, _, rest = filename[:-len(PROFILE_SUFFIX)].partition("_")
+        method, _, route = rest.partition("_")
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            continue
+        stat = os.stat(os.path.join(profile_dir, filename))
+        profiles.append(StoredProfile(
+            id=profile_id,
+            method=method,
+            route=route,
+            size_bytes=stat.st_size,
+            created_at=datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+        ))
+    # Ids start with their UTC timestamp
+    return sorted(profiles, key=lambda profile: profile.id, reverse=True)
+
+
+def profile_path(profile_dir: str, profile_id: str) -> Optional[str]:
+    """Path of a stored profile, or None"""
+    if not PROFILE_ID_PATTERN.match(profile_id) or not os.path.isdir(profile_dir):
+        return None
+    for filename in os.listdir(profile_dir):
+        if filename.startswith(profile_id + "_") and filename.endswith(PROFILE_SUFFIX):
+            return os.path.join(profile_dir, filename)
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that ask for it
+
+    Args:
+        profile_dir: Where profiles are written
+        max_files: Profiles kept; older ones are deleted
+        interval: Sampling interval in seconds
+    """
+
+    def __init__(self, app: ASGIApp, profile_dir: str, max_files: int, interval: float):
+        self.app = app
+        self.profile_dir = profile_dir
+        self.max_files = max_files
+        self.interval = interval
+        self._active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _requested(scope) or not await _is_admin(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            await self.app(scope, receive, self._with_headers(send, {"X-Profile-Error": "pyinstrument is not installed"}))
+            return
+        if self._active:
+            await self.app(scope, receive, self._with_headers(send, {"X-Profile-Error": "Another request is being profiled"}))
+            return
+
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        self._active = True
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, self._with_headers(send, {"X-Profile-Id": profile_id}))
+        finally:
+            profiler.stop()
+            self._active = False
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+        filename = f"{profile_id}_{scope['method']}_{_route_slug(scope)}{PROFILE_SUFFIX}"
+        try:
+            # The response has been sent; rendering and file I/O stay off the loop
+            await run_in_threadpool(self._save, profiler, filename)
+        except Exception as e:
+            logger.error(f"Failed to store profile {profile_id}: {e}")
+            return
+        logger.info(f"Stored profile {filename} of a {elapsed_ms:.1f} ms request")
+
+    @staticmethod
+    def _with_headers(send: Send, headers: Dict[str, str]) -> Send:
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+        return send_with_headers
+
+    def _save(self, profiler, filename: str) -> None:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, filename)
+        with open(path + ".partial", "w", encoding="utf-8") as output:
+            output.write(profiler.output(renderer=SpeedscopeRenderer()))
+        os.replace(path + ".partial", path)
+
+        for profile in list_profiles(self.profile_dir)[self.max_files:]:
+            stale = profile_path(self.profile_dir, profile.id)
+            if stale is not None:
+                os.remove(stale)
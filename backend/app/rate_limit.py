@@ -0,0 +1,274 @@
+"""
+Token-bucket rate limiting.
+
+RateLimitMiddleware is plain ASGI: it runs before routing and never buffers
+a body. Each API request takes one token from a bucket keyed on the route's
+rule and on the caller, the user id from a valid bearer token or else the
+client IP. Buckets refill continuously at requests/period and hold at most
+``requests`` tokens, so a client can burst to the full limit and then
+continues at the sustained rate. Rules are matched on the exact request path
+with a default for everything else under the API prefix; paths outside it
+(health checks, docs) are not limited.
+
+Every limited response carries the RateLimit-Limit, RateLimit-Remaining,
+RateLimit-Reset and RateLimit-Policy headers of the IETF RateLimit header
+fields draft; rejected requests get a 429 with Retry-After.
+
+MemoryRateLimitBackend keeps buckets per process, which is right for a
+single worker. RedisRateLimitBackend keeps them in Redis, updated by one
+Lua script per request with the Redis server's clock, so all workers share
+the limits. If Redis fails the request is allowed: the limiter protects
+capacity, it must not become an outage of its own.
+
+Client IPs come from the ASGI scope; behind a proxy run uvicorn with
+--proxy-headers so that is the real client.
+"""
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from cachetools import LRUCache
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .security import decode_token_claims
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """requests per period seconds"""
+    requests: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse "<requests>/<second|minute|hour>", e.g. "10/minute" """
+        requests, _, period = value.partition("/")
+        try:
+            return cls(int(requests), PERIODS[period.strip()])
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '10/minute'")
+
+    @property
+    def refill_rate(self) -> float:
+        """Tokens added back per second"""
+        return self.requests / self.period
+
+    @property
+    def policy(self) -> str:
+        return f"{self.requests};w={int(self.period)}"
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    # Tokens left after this request
+    remaining: float
+
+
+class MemoryRateLimitBackend:
+    """Per-process buckets, least recently used evicted past max_keys"""
+
+    def __init__(self, max_keys: int):
+        # key -> (tokens, monotonic time of the last update). An evicted
+        # bucket comes back full, so max_keys only needs to cover the
+        # clients active within one refill period
+        self._buckets: LRUCache = LRUCache(maxsize=max_keys)
+
+    async def take(self, key: str, limit: RateLimit) -> RateLimitDecision:
+        # No await in here: the read-modify-write is atomic on the event loop
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.requests, now))
+        tokens = min(limit.requests, tokens + (now - updated) * limit.refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        return RateLimitDecision(allowed, tokens)
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "buckets": self._buckets.currsize, "max_buckets": self._buckets.maxsize}
+
+
+# KEYS[1]: bucket; ARGV: capacity, refill rate per second.
+# Returns {allowed, tokens left as a string (Lua numbers become integers)}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend:
+    """Buckets shared by every worker, as Redis hashes expiring once full"""
+
+    def __init__(self, url: str, key_prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("rate_limit_redis_url is set but the redis package is not installed")
+        self.url = url
+        self.key_prefix = key_prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, limit: RateLimit) -> RateLimitDecision:
+        allowed, tokens = await self._script(keys=[self.key_prefix + key], args=[limit.requests, limit.refill_rate])
+        return RateLimitDecision(bool(allowed), float(tokens))
+
+    async def close(self) -> None:
+        # aclose() replaced close() in redis 5
+        close = getattr(self._client, "aclose", None) or self._client.close
+        await close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+class RateLimiter:
+    """Routes to rules, callers to buckets, and counts the outcome"""
+
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.allowed = 0
+        self.limited = 0
+        self.backend_errors = 0
+
+    async def take(self, key: str, limit: RateLimit) -> RateLimitDecision:
+        try:
+            decision = await self.backend.take(key, limit)
+        except Exception as e:
+            # Fail open
+            self.backend_errors += 1
+            logger.error(f"Rate limit backend failed, allowing request: {e}")
+            return RateLimitDecision(True, limit.requests)
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return decision
+
+    async def close(self) -> None:
+        """Release the backend's connections"""
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "backend_errors": self.backend_errors,
+            **self.backend.stats(),
+        }
+
+
+def client_identity(scope: Scope) -> str:
+    """user:<id> for a valid bearer token, else ip:<client address>"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                claims = decode_token_claims(token)
+                if claims and claims.get("uid") is not None:
+                    return f"user:{claims['uid']}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying rate limits
+
+    Args:
+        limiter: Limiter holding the buckets
+        prefix: Only paths under it are limited
+        default: Limit for paths without their own rule
+        rules: Exact path -> limit
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter,
+        prefix: str,
+        default: str,
+        rules: Optional[Dict[str, str]] = None,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.prefix = prefix
+        self.default = ("default", RateLimit.parse(default))
+        self.rules = {path: (path, RateLimit.parse(limit)) for path, limit in (rules or {}).items()}
+
+    def _rule(self, path: str) -> Optional[Tuple[str, RateLimit]]:
+        rule = self.rules.get(path.rstrip("/") or "/")
+        if rule is None and path.startswith(self.prefix):
+            rule = self.default
+        return rule
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.limiter.enabled or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        rule = self._rule(scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        name, limit = rule
+        decision = await self.limiter.take(f"{name}:{client_identity(scope)}", limit)
+        headers = {
+            "RateLimit-Limit": str(limit.requests),
+            "RateLimit-Remaining": str(int(decision.remaining)),
+            # Seconds until the bucket is full again
+            "RateLimit-Reset": str(math.ceil((limit.requests - decision.remaining) / limit.refill_rate)),
+            "RateLimit-Policy": limit.policy,
+        }
+        if not decision.allowed:
+            headers["Retry-After"] = str(math.ceil((1 - decision.remaining) / limit.refill_rate))
+            response = JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def create_backend():
+    if settings.rate_limit_redis_url:
+        return RedisRateLimitBackend(settings.rate_limit_redis_url)
+    return MemoryRateLimitBackend(max_keys=settings.rate_limit_memory_max_keys)
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(create_backend(), enabled=settings.rate_limit_enabled)
@@ -0,0 +1,46 @@
+import os
+from dataclasses import asdict
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from ..config import settings
+from ..profiling import list_profiles, profile_path
+from ..security import require_admin
+from ..slow_queries import slow_query_log
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+@router.get("/slow-queries")
+async def get_slow_queries(limit: Optional[int] = Query(None, ge=1)):
+    """Most recent slow SQL statements with their EXPLAIN plans, newest first"""
+    return {
+        "stats": slow_query_log.stats(),
+        "items": slow_query_log.entries(limit),
+    }
+
+@router.delete("/slow-queries")
+async def clear_slow_queries():
+    """Empty the slow-query buffer"""
+    slow_query_log.clear()
+    return {"message": "Slow-query buffer cleared"}
+
+@router.get("/profiles")
+async def get_profiles():
+    """Stored request profiles, newest first"""
+    profiles = await run_in_threadpool(list_profiles, settings.profile_dir)
+    return [asdict(profile) for profile in profiles]
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """Download a profile in speedscope format (open it at https://www.speedscope.app)"""
+    path = await run_in_threadpool(profile_path, settings.profile_dir, profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=os.path.basename(path))
@@ -1,65 +1,101 @@
 from datetime import datetime, timezone
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..models import ThirdPartyRiskAssessment
-from ..schemas import AssessmentCreate, AssessmentResponse, AssessmentUpdate
+from ..pagination import PageParams, paginate
+from ..schemas import (AssessmentCreate, AssessmentResponse, AssessmentUpdate,
+                       Page)
+from ..services.audit import AuditActor, audit_actor, audit_writer
+from ..services.export import EXPORT_FORMAT_PATTERN, export_response
+from ..services.reassessment_scheduler import reassessment_scheduler
+from ..services.score_aggregates import contribution, record_score_change
+from ..services.score_cache import vendor_score_cache
 
 router = APIRouter(
     prefix="/assessments",
     tags=["assessments"]
 )
 
+ASSESSMENT_SORT_COLUMNS = {
+    "id": ThirdPartyRiskAssessment.id,
+    "date_assessed": ThirdPartyRiskAssessment.date_assessed,
+}
+
 @router.post("/", response_model=AssessmentResponse)
-def create_assessment(assessment_data: AssessmentCreate, db: Session = Depends(get_db)):
+async def create_assessment(assessment_data: AssessmentCreate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Create a new risk assessment"""
     assessment_dict = assessment_data.model_dump()
-    assessment_dict['date_assessed'] = datetime.now(timezone.utc)
+    # created_at is the write time score_aggregates anchors to; set it with
+    # date_assessed so the two agree to the microsecond
+    assessment_dict['date_assessed'] = assessment_dict['created_at'] = datetime.now(timezone.utc)
     
     assessment = ThirdPartyRiskAssessment(**assessment_dict)
     db.add(assessment)
-    db.commit()
-    db.refresh(assessment)
+    await record_score_change(db, None, contribution(assessment))
+    await db.commit()
+    await db.refresh(assessment)
+    vendor_score_cache.invalidate([assessment.company_id])
+    reassessment_scheduler.schedule(assessment.id, assessment.next_assessment_date)
+    audit_writer.record(actor, "CREATE", "assessment", assessment.id, {"company_id": assessment.company_id})
     return assessment
 
+@router.get("/export")
+async def export_assessments(export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    """Stream every assessment row as NDJSON or CSV"""
+    return export_response(ThirdPartyRiskAssessment, export_format, "assessments")
+
 @router.get("/{assessment_id}", response_model=AssessmentResponse)
-def get_assessment(assessment_id: int, db: Session = Depends(get_db)):
+async def get_assessment(assessment_id: int, db: AsyncSession = Depends(get_db)):
     """Get an assessment by ID"""
-    assessment = db.query(ThirdPartyRiskAssessment).filter(ThirdPartyRiskAssessment.id == assessment_id).first()
+    assessment = await db.get(ThirdPartyRiskAssessment, assessment_id)
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     return assessment
 
-@router.get("/", response_model=List[AssessmentResponse])
-def get_assessments(db: Session = Depends(get_db)):
-    """Get all assessments"""
-    return db.query(ThirdPartyRiskAssessment).all()
+@router.get("/", response_model=Page[AssessmentResponse])
+async def get_assessments(page: PageParams = Depends(), db: AsyncSession = Depends(get_db)):
+    """Get a page of assessments"""
+    return await paginate(
+        db, select(ThirdPartyRiskAssessment), ThirdPartyRiskAssessment.id, ASSESSMENT_SORT_COLUMNS, page
+    )
 
 @router.put("/{assessment_id}", response_model=AssessmentResponse)
-def update_assessment(assessment_id: int, assessment_data: AssessmentUpdate, db: Session = Depends(get_db)):
+async def update_assessment(assessment_id: int, assessment_data: AssessmentUpdate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Update an assessment"""
-    assessment = db.query(ThirdPartyRiskAssessment).filter(ThirdPartyRiskAssessment.id == assessment_id).first()
+    assessment = await db.get(ThirdPartyRiskAssessment, assessment_id)
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
+    previous_company_id = assessment.company_id
+    previous_contribution = contribution(assessment)
     update_data = assessment_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(assessment, field, value)
     
-    db.commit()
-    db.refresh(assessment)
+    await record_score_change(db, previous_contribution, contribution(assessment))
+    await db.commit()
+    await db.refresh(assessment)
+    vendor_score_cache.invalidate([previous_company_id, assessment.company_id])
+    if "next_assessment_date" in update_data:
+        reassessment_scheduler.schedule(assessment.id, assessment.next_assessment_date)
+    audit_writer.record(actor, "UPDATE", "assessment", assessment_id, {"fields": sorted(update_data)})
     return assessment
 
 @router.delete("/{assessment_id}")
-def delete_assessment(assessment_id: int, db: Session = Depends(get_db)):
+async def delete_assessment(assessment_id: int, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Delete an assessment"""
-    assessment = db.query(ThirdPartyRiskAssessment).filter(ThirdPartyRiskAssessment.id == assessment_id).first()
+    assessment = await db.get(ThirdPartyRiskAssessment, assessment_id)
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    db.delete(assessment)
-    db.commit()
+    company_id = assessment.company_id
+    await record_score_change(db, contribution(assessment), None)
+    await db.delete(assessment)
+    await db.commit()
+    vendor_score_cache.invalidate([company_id])
+    reassessment_scheduler.unschedule(assessment_id)
+    audit_writer.record(actor, "DELETE", "assessment", assessment_id, {"company_id": company_id})
     return {"message": "Assessment deleted successfully"}
@@ -1,33 +1,47 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import settings
 from ..database import get_db
 from ..models import User
-from ..schemas import LoginRequest, UserResponse
-from ..security import create_access_token, get_current_user, verify_password
+from ..schemas import LoginRequest, TokenRevokeRequest, UserResponse
+from ..security import (create_access_token, decode_token_claims,
+                        get_current_user, oauth2_scheme, require_admin)
+from ..services.audit import AuditActor, audit_actor, audit_writer
+from ..services.password_hashing import password_hasher
+from ..services.token_revocation import token_revocation_list
+from ..services.user_cache import authenticated_user_cache
 
 router = APIRouter(
     prefix="/auth",
     tags=["auth"]
 )
 
-def authenticate_user(db: Session, username: str, password: str):
+async def authenticate_user(db: AsyncSession, username: str, password: str):
     """Authenticate a user against the database"""
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is CPU-bound; it runs on the dedicated hashing executor
+    verified, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not verified or not user.is_active:
         return False
+    if new_hash is not None:
+        # Hashed with an outdated cost factor; upgrade while we have the password
+        user.hashed_password = new_hash
+        await db.commit()
+        authenticated_user_cache.invalidate([user.username])
     return user
 
 @router.post("/token")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """Login and get an access token (OAuth2 compatible)"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,15 +50,15 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
         )
     
     access_token = create_access_token(
-        data={"sub": user.username, "role": user.role}, 
+        data={"sub": user.username, "uid": user.id, "role": user.role},
         expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login")
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_db)):
     """Login and get access token with user data"""
-    user = authenticate_user(db, login_data.username, login_data.password)
+    user = await authenticate_user(db, login_data.username, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,7 +66,7 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
         )
     
     access_token = create_access_token(
-        data={"sub": user.username, "role": user.role}, 
+        data={"sub": user.username, "uid": user.id, "role": user.role},
         expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
     )
     
@@ -70,6 +84,48 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     }
 
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user)):
     """Get current user"""
     return current_user
+
+async def revoke_token(db: AsyncSession, actor: AuditActor, claims: dict) -> None:
+    """Revoke the token with the given claims until it expires"""
+    if claims.get("jti") is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token has no jti and cannot be revoked; it expires on its own",
+        )
+    expires_at = datetime.fromtimestamp(claims["exp"], timezone.utc)
+    if await token_revocation_list.revoke(db, claims["jti"], claims.get("uid"), expires_at):
+        audit_writer.record(actor, "REVOKE_TOKEN", "user", claims.get("uid"), {"jti": claims["jti"]})
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    actor: AuditActor = Depends(audit_actor),
+    db: AsyncSession = Depends(get_db),
+):
+    """Revoke the access token used for this request"""
+    # get_current_user has already validated the token
+    await revoke_token(db, actor, decode_token_claims(token))
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
+async def revoke_access_token(
+    revoke_data: TokenRevokeRequest,
+    actor: AuditActor = Depends(audit_actor),
+    db: AsyncSession = Depends(get_db),
+):
+    """Revoke another user's access token (admin only)"""
+    claims = decode_token_claims(revoke_data.access_token)
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token is invalid or already expired",
+        )
+    await revoke_token(db, actor, claims)
+
+@router.get("/revocations/stats", dependencies=[Depends(require_admin)])
+async def get_token_revocation_stats():
+    """Token revocation filter statistics (admin only)"""
+    return token_revocation_list.stats()
@@ -1,47 +1,61 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..models import Company
-from ..schemas import CompanyCreate, CompanyResponse, CompanyUpdate
+from ..pagination import PageParams, paginate
+from ..schemas import CompanyCreate, CompanyResponse, CompanyUpdate, Page
+from ..services.audit import AuditActor, audit_actor, audit_writer
+from ..services.export import EXPORT_FORMAT_PATTERN, export_response
+from ..services.score_cache import vendor_score_cache
 
 router = APIRouter(
     prefix="/companies",
     tags=["companies"]
 )
 
+COMPANY_SORT_COLUMNS = {
+    "id": Company.id,
+    "name": Company.name,
+}
+
 @router.post("/", response_model=CompanyResponse)
-def create_company(company_data: CompanyCreate, db: Session = Depends(get_db)):
+async def create_company(company_data: CompanyCreate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Create a new company"""
-    existing = db.query(Company).filter(Company.name == company_data.name).first()
-    if existing:
+    result = await db.execute(select(Company.id).where(Company.name == company_data.name))
+    if result.first():
         raise HTTPException(status_code=400, detail="Company already exists")
     
     new_company = Company(**company_data.model_dump())
     db.add(new_company)
-    db.commit()
-    db.refresh(new_company)
+    await db.commit()
+    await db.refresh(new_company)
+    audit_writer.record(actor, "CREATE", "company", new_company.id)
     return new_company
 
+@router.get("/export")
+async def export_companies(export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    """Stream every company row as NDJSON or CSV"""
+    return export_response(Company, export_format, "companies")
+
 @router.get("/{company_id}", response_model=CompanyResponse)
-def get_company(company_id: int, db: Session = Depends(get_db)):
+async def get_company(company_id: int, db: AsyncSession = Depends(get_db)):
     """Get a company by ID"""
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = await db.get(Company, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     return company
 
-@router.get("/", response_model=List[CompanyResponse])
-def get_companies(db: Session = Depends(get_db)):
-    """Get all companies"""
-    return db.query(Company).all()
+@router.get("/", response_model=Page[CompanyResponse])
+async def get_companies(page: PageParams = Depends(), db: AsyncSession = Depends(get_db)):
+    """Get a page of companies"""
+    return await paginate(db, select(Company), Company.id, COMPANY_SORT_COLUMNS, page)
 
 @router.put("/{company_id}", response_model=CompanyResponse)
-def update_company(company_id: int, company_data: CompanyUpdate, db: Session = Depends(get_db)):
+async def update_company(company_id: int, company_data: CompanyUpdate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Update a company"""
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = await db.get(Company, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
@@ -49,17 +63,21 @@ def update_company(company_id: int, company_data: CompanyUpdate, db: Session = D
     for field, value in update_data.items():
         setattr(company, field, value)
     
-    db.commit()
-    db.refresh(company)
+    await db.commit()
+    await db.refresh(company)
+    audit_writer.record(actor, "UPDATE", "company", company_id, {"fields": sorted(update_data)})
     return company
 
 @router.delete("/{company_id}")
-def delete_company(company_id: int, db: Session = Depends(get_db)):
+async def delete_company(company_id: int, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Delete a company"""
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = await db.get(Company, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    db.delete(company)
-    db.commit()
+    await db.delete(company)
+    await db.commit()
+    # Its assessments went with it (delete-orphan cascade)
+    vendor_score_cache.invalidate([company_id])
+    audit_writer.record(actor, "DELETE", "company", company_id)
     return {"message": "Company deleted successfully"}
@@ -1,48 +1,66 @@
 from datetime import datetime, timezone
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..models import DueDiligenceRequest
+from ..pagination import PageParams, paginate
 from ..schemas import (DueDiligenceCreate, DueDiligenceResponse,
-                       DueDiligenceUpdate)
+                       DueDiligenceUpdate, Page)
+from ..services.audit import AuditActor, audit_actor, audit_writer
 
 router = APIRouter(
     prefix="/due_diligence",
     tags=["due_diligence"]
 )
 
+DUE_DILIGENCE_STATUS_PATTERN = "^(PENDING|APPROVED|REJECTED|COMPLETED|OVERDUE)$"
+
+DUE_DILIGENCE_SORT_COLUMNS = {
+    "id": DueDiligenceRequest.id,
+    "request_date": DueDiligenceRequest.request_date,
+}
+
 @router.post("/", response_model=DueDiligenceResponse)
-def create_due_diligence_request(dd_data: DueDiligenceCreate, db: Session = Depends(get_db)):
+async def create_due_diligence_request(dd_data: DueDiligenceCreate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Create a new due diligence request"""
     dd_dict = dd_data.model_dump()
     dd_dict['request_date'] = datetime.now(timezone.utc)
     
     request = DueDiligenceRequest(**dd_dict)
     db.add(request)
-    db.commit()
-    db.refresh(request)
+    await db.commit()
+    await db.refresh(request)
+    audit_writer.record(actor, "CREATE", "due_diligence_request", request.id)
     return request
 
 @router.get("/{request_id}", response_model=DueDiligenceResponse)
-def get_due_diligence_request(request_id: int, db: Session = Depends(get_db)):
+async def get_due_diligence_request(request_id: int, db: AsyncSession = Depends(get_db)):
     """Get a due diligence request by ID"""
-    request = db.query(DueDiligenceRequest).filter(DueDiligenceRequest.id == request_id).first()
+    request = await db.get(DueDiligenceRequest, request_id)
     if not request:
         raise HTTPException(status_code=404, detail="Due diligence request not found")
     return request
 
-@router.get("/", response_model=List[DueDiligenceResponse])
-def get_due_diligence_requests(db: Session = Depends(get_db)):
-    """Get all due diligence requests"""
-    return db.query(DueDiligenceRequest).all()
+@router.get("/", response_model=Page[DueDiligenceResponse])
+async def get_due_diligence_requests(
+    status: Optional[str] = Query(None, pattern=DUE_DILIGENCE_STATUS_PATTERN),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a page of due diligence requests, optionally filtered by status"""
+    query = select(DueDiligenceRequest)
+    if status:
+        query = query.where(DueDiligenceRequest.status == status)
+    return await paginate(db, query, DueDiligenceRequest.id, DUE_DILIGENCE_SORT_COLUMNS, page)
 
 @router.put("/{request_id}", response_model=DueDiligenceResponse)
-def update_due_diligence_request(request_id: int, dd_data: DueDiligenceUpdate, db: Session = Depends(get_db)):
+async def update_due_diligence_request(request_id: int, dd_data: DueDiligenceUpdate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Update a due diligence request"""
-    request = db.query(DueDiligenceRequest).filter(DueDiligenceRequest.id == request_id).first()
+    request = await db.get(DueDiligenceRequest, request_id)
     if not request:
         raise HTTPException(status_code=404, detail="Due diligence request not found")
     
@@ -50,17 +68,19 @@ def update_due_diligence_request(request_id: int, dd_data: DueDiligenceUpdate, d
     for field, value in update_data.items():
         setattr(request, field, value)
     
-    db.commit()
-    db.refresh(request)
+    await db.commit()
+    await db.refresh(request)
+    audit_writer.record(actor, "UPDATE", "due_diligence_request", request_id, {"fields": sorted(update_data)})
     return request
 
 @router.delete("/{request_id}")
-def delete_due_diligence_request(request_id: int, db: Session = Depends(get_db)):
+async def delete_due_diligence_request(request_id: int, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Delete a due diligence request"""
-    request = db.query(DueDiligenceRequest).filter(DueDiligenceRequest.id == request_id).first()
+    request = await db.get(DueDiligenceRequest, request_id)
     if not request:
         raise HTTPException(status_code=404, detail="Due diligence request not found")
     
-    db.delete(request)
-    db.commit()
+    await db.delete(request)
+    await db.commit()
+    audit_writer.record(actor, "DELETE", "due_diligence_request", request_id)
     return {"message": "Due diligence request deleted successfully"}
@@ -1,10 +1,11 @@
-from typing import List
-
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import models, schemas
 from ..database import get_db
+from ..pagination import PageParams, paginate
+from ..services.audit import AuditActor, audit_actor, audit_writer
 
 router = APIRouter(
     prefix="/engagements",
@@ -14,43 +15,49 @@ router = APIRouter(
 # Error messages
 ENGAGEMENT_NOT_FOUND = "Engagement not found"
 
+ENGAGEMENT_SORT_COLUMNS = {
+    "id": models.Engagement.id,
+}
+
 @router.post("/", response_model=schemas.EngagementResponse)
-def create_engagement(engagement: schemas.EngagementCreate, db: Session = Depends(get_db)):
+async def create_engagement(engagement: schemas.EngagementCreate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     db_engagement = models.Engagement(**engagement.dict())
     db.add(db_engagement)
-    db.commit()
-    db.refresh(db_engagement)
+    await db.commit()
+    await db.refresh(db_engagement)
+    audit_writer.record(actor, "CREATE", "engagement", db_engagement.id)
     return db_engagement
 
-@router.get("/", response_model=List[schemas.EngagementResponse])
-def read_engagements(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    engagements = db.query(models.Engagement).offset(skip).limit(limit).all()
-    return engagements
+@router.get("/", response_model=schemas.Page[schemas.EngagementResponse])
+async def read_engagements(page: PageParams = Depends(), db: AsyncSession = Depends(get_db)):
+    return await paginate(db, select(models.Engagement), models.Engagement.id, ENGAGEMENT_SORT_COLUMNS, page)
 
 @router.get("/{engagement_id}", response_model=schemas.EngagementResponse)
-def read_engagement(engagement_id: int, db: Session = Depends(get_db)):
-    engagement = db.query(models.Engagement).filter(models.Engagement.id == engagement_id).first()
+async def read_engagement(engagement_id: int, db: AsyncSession = Depends(get_db)):
+    engagement = await db.get(models.Engagement, engagement_id)
     if engagement is None:
         raise HTTPException(status_code=404, detail=ENGAGEMENT_NOT_FOUND)
     return engagement
 
 @router.put("/{engagement_id}", response_model=schemas.EngagementResponse)
-def update_engagement(engagement_id: int, engagement: schemas.EngagementUpdate, db: Session = Depends(get_db)):
-    db_engagement = db.query(models.Engagement).filter(models.Engagement.id == engagement_id).first()
+async def update_engagement(engagement_id: int, engagement: schemas.EngagementUpdate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
+    db_engagement = await db.get(models.Engagement, engagement_id)
     if db_engagement is None:
         raise HTTPException(status_code=404, detail=ENGAGEMENT_NOT_FOUND)
     update_data = engagement.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_engagement, key, value)
-    db.commit()
-    db.refresh(db_engagement)
+    await db.commit()
+    await db.refresh(db_engagement)
+    audit_writer.record(actor, "UPDATE", "engagement", engagement_id, {"fields": sorted(update_data)})
     return db_engagement
 
 @router.delete("/{engagement_id}", response_model=schemas.EngagementResponse)
-def delete_engagement(engagement_id: int, db: Session = Depends(get_db)):
-    db_engagement = db.query(models.Engagement).filter(models.Engagement.id == engagement_id).first()
+async def delete_engagement(engagement_id: int, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
+    db_engagement = await db.get(models.Engagement, engagement_id)
     if db_engagement is None:
         raise HTTPException(status_code=404, detail=ENGAGEMENT_NOT_FOUND)
-    db.delete(db_engagement)
-    db.commit()
-    return db_engagement
\ No newline at end of file
+    await db.delete(db_engagement)
+    await db.commit()
+    audit_writer.record(actor, "DELETE", "engagement", engagement_id)
+    return db_engagement
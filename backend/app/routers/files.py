@@ -1,14 +1,17 @@
 import logging
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Optional
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import models, schemas
 from ..config import settings
 from ..database import get_db
+from ..pagination import PageParams, paginate
 from ..security import get_current_user
+from ..services.audit import AuditActor, audit_actor, audit_writer
 from ..services.azure_storage import azure_storage_service
 
 logger = logging.getLogger(__name__)
@@ -21,6 +24,10 @@ router = APIRouter(
 # Error messages
 DOCUMENT_NOT_FOUND = "Document not found"
 
+DOCUMENT_SORT_COLUMNS = {
+    "id": models.Document.id,
+}
+
 @router.post("/upload-url", response_model=dict)
 async def get_upload_url(
     file_name: str = Form(...),
@@ -28,7 +35,8 @@ async def get_upload_url(
     company_id: int = Form(...),
     document_type: str = Form(...),
     current_user: schemas.UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    actor: AuditActor = Depends(audit_actor),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a secure upload URL with SAS token for file upload
@@ -66,11 +74,12 @@ async def get_upload_url(
         )
         
         db.add(document)
-        db.commit()
-        db.refresh(document)
+        await db.commit()
+        await db.refresh(document)
         
         # Add document ID to upload data
         upload_data["document_id"] = document.id
+        audit_writer.record(actor, "CREATE", "document", document.id, {"company_id": company_id})
         
         logger.info(f"Generated upload URL for document {document.id} - {file_name}")
         return upload_data
@@ -84,13 +93,14 @@ async def confirm_upload(
     document_id: int,
     file_size: int = Form(...),
     current_user: schemas.UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    actor: AuditActor = Depends(audit_actor),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Confirm file upload and update document metadata
     """
     try:
-        document = db.query(models.Document).filter(models.Document.id == document_id).first()
+        document = await db.get(models.Document, document_id)
         if not document:
             raise HTTPException(status_code=404, detail=DOCUMENT_NOT_FOUND)
         
@@ -103,8 +113,9 @@ async def confirm_upload(
         document.status = "ACTIVE"
         document.upload_date = datetime.now(timezone.utc)
         
-        db.commit()
-        db.refresh(document)
+        await db.commit()
+        await db.refresh(document)
+        audit_writer.record(actor, "UPDATE", "document", document_id, {"fields": ["file_size", "status", "upload_date"]})
         
         logger.info(f"Confirmed upload for document {document_id}")
         return {"message": "Upload confirmed successfully", "document_id": document_id}
@@ -117,13 +128,13 @@ async def confirm_upload(
 async def get_download_url(
     document_id: int,
     current_user: schemas.UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a secure download URL for a document
     """
     try:
-        document = db.query(models.Document).filter(models.Document.id == document_id).first()
+        document = await db.get(models.Document, document_id)
         if not document:
             raise HTTPException(status_code=404, detail=DOCUMENT_NOT_FOUND)
         
@@ -142,27 +153,30 @@ async def get_download_url(
         logger.error(f"Failed to generate download URL: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate download URL")
 
-@router.get("/company/{company_id}", response_model=List[schemas.DocumentResponse])
+@router.get("/company/{company_id}", response_model=schemas.Page[schemas.DocumentResponse])
 async def get_company_documents(
     company_id: int,
     document_type: Optional[str] = None,
+    page: PageParams = Depends(),
     current_user: schemas.UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Get all documents for a company
+    Get a page of documents for a company
     """
     try:
-        query = db.query(models.Document).filter(models.Document.company_id == company_id)
+        query = select(models.Document).where(models.Document.company_id == company_id)
         
         if document_type:
-            query = query.filter(models.Document.document_type == document_type)
+            query = query.where(models.Document.document_type == document_type)
         
-        documents = query.all()
+        documents = await paginate(db, query, models.Document.id, DOCUMENT_SORT_COLUMNS, page)
         
-        logger.info(f"Retrieved {len(documents)} documents for company {company_id}")
+        logger.info(f"Retrieved {len(documents['items'])} documents for company {company_id}")
         return documents
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to retrieve company documents: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve documents")
@@ -171,19 +185,21 @@ async def get_company_documents(
 async def delete_document(
     document_id: int,
     current_user: schemas.UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    actor: AuditActor = Depends(audit_actor),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a document (soft delete)
     """
     try:
-        document = db.query(models.Document).filter(models.Document.id == document_id).first()
+        document = await db.get(models.Document, document_id)
         if not document:
             raise HTTPException(status_code=404, detail=DOCUMENT_NOT_FOUND)
         
         # Soft delete - mark as deleted
         document.status = "DELETED"
-        db.commit()
+        await db.commit()
+        audit_writer.record(actor, "DELETE", "document", document_id)
         
         logger.info(f"Soft deleted document {document_id}")
         return {"message": "Document deleted successfully"}
@@ -196,13 +212,13 @@ async def delete_document(
 async def get_document_metadata(
     document_id: int,
     current_user: schemas.UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get document metadata from Azure Storage
     """
     try:
-        document = db.query(models.Document).filter(models.Document.id == document_id).first()
+        document = await db.get(models.Document, document_id)
         if not document:
             raise HTTPException(status_code=404, detail=DOCUMENT_NOT_FOUND)
         
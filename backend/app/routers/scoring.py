@@ -1,16 +1,191 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
-from ..services.scoring import calculate_vendor_risk_score
+from ..models import Company
+from ..pagination import decode_cursor, encode_cursor
+from ..schemas import (RISK_TIER_PATTERN, Page, ScoringSimulationRequest,
+                       ScoringSimulationResponse, VendorScore,
+                       VendorScoreHistoryResponse)
+from ..security import require_admin
+from ..services.audit import AuditActor, audit_actor, audit_writer
+from ..services.score_cache import vendor_score_cache
+from ..services.scoring import (SCORE_HISTORY_BUCKET_PATTERN,
+                                calculate_vendor_risk_score,
+                                calculate_vendor_risk_scores,
+                                calculate_weighted_vendor_scores,
+                                get_vendor_score_history)
+from ..services.scoring_engine import ScoringWeights, TierThresholds
+from ..services.scoring_simulation import simulate_scoring
+from ..services.tier_recalc import (RecalculationInProgress,
+                                    recalculate_risk_tiers)
 
 router = APIRouter(
     prefix="/scoring",
     tags=["scoring"]
 )
 
+VENDOR_SCORES_CURSOR_KEY = "company_id"
+
+async def _vendor_scores_page(
+    score_vendors: Callable[..., Awaitable[List[Tuple[int, float, int]]]],
+    db: AsyncSession,
+    cursor: Optional[str],
+    limit: int,
+    **filters,
+):
+    """One company_id-keyed page of (company_id, risk_score, assessment_count) rows from score_vendors"""
+    after_company_id = None
+    if cursor:
+        _, after_company_id = decode_cursor(cursor, VENDOR_SCORES_CURSOR_KEY)
+
+    rows = await score_vendors(db, after_company_id=after_company_id, limit=limit + 1, **filters)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(VENDOR_SCORES_CURSOR_KEY, None, rows[-1][0])
+    return {
+        "items": [
+            {"company_id": company_id, "risk_score": score, "assessment_count": count}
+            for company_id, score, count in rows
+        ],
+        "next_cursor": next_cursor,
+    }
+
 @router.get("/vendor/{company_id}")
-def get_vendor_risk_score(company_id: int, db: Session = Depends(get_db)):
-    score = calculate_vendor_risk_score(company_id, db)
-    if score is None:
-        raise HTTPException(status_code=404, detail="No assessments found for vendor")
-    return {"company_id": company_id, "risk_score": score}
+async def get_vendor_risk_score(company_id: int, db: AsyncSession = Depends(get_db)):
+    scores = await vendor_score_cache.get_or_compute(
+        company_id, lambda: calculate_vendor_risk_score(company_id, db)
+    )
+    if scores is None:
+        raise HTTPException(status_code=404, detail="No scored assessments found for vendor")
+    risk_score, weighted_risk_score = scores
+    return {"company_id": company_id, "risk_score": risk_score, "weighted_risk_score": weighted_risk_score}
+
+@router.get("/vendor/{company_id}/history", response_model=VendorScoreHistoryResponse)
+async def get_vendor_score_history_route(
+    company_id: int,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    bucket: str = Query("month", pattern=SCORE_HISTORY_BUCKET_PATTERN),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Score trend for a vendor, downsampled server-side to one point per
+    day, week or month in [from, to)
+    """
+    if not await db.get(Company, company_id):
+        raise HTTPException(status_code=404, detail="Company not found")
+
+    points = await get_vendor_score_history(company_id, db, bucket, date_from, date_to)
+    return {"company_id": company_id, "bucket": bucket, "points": points}
+
+@router.post("/simulate", response_model=ScoringSimulationResponse)
+async def simulate_vendor_scoring(request: ScoringSimulationRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Re-score the whole portfolio under candidate weights, half-life and tier
+    thresholds and report which vendors would change risk_tier. Read-only.
+    """
+    current_weights = ScoringWeights.from_settings()
+    current_thresholds = TierThresholds.from_settings()
+    candidate = request.weights.model_dump(exclude_none=True)
+    weights = ScoringWeights(
+        type_weights={
+            **current_weights.type_weights,
+            **{name.upper(): weight for name, weight in candidate.items()},
+        },
+        half_life_days=(
+            request.half_life_days if request.half_life_days is not None else current_weights.half_life_days
+        ),
+    )
+    thresholds = TierThresholds(**{
+        **vars(current_thresholds),
+        **request.thresholds.model_dump(exclude_none=True),
+    })
+    if not thresholds.medium <= thresholds.high <= thresholds.critical:
+        raise HTTPException(status_code=400, detail="Tier thresholds must be ascending: medium <= high <= critical")
+
+    return await simulate_scoring(db, weights, thresholds, request.top_n)
+
+@router.post("/tiers/recalculate", dependencies=[Depends(require_admin)])
+async def recalculate_vendor_risk_tiers(
+    dry_run: bool = False,
+    workers: Optional[int] = Query(None, ge=1, le=64),
+    actor: AuditActor = Depends(audit_actor),
+):
+    """
+    Derive every vendor's risk_tier from its assessments (admin only)
+
+    Runs the same process-pool job as ``python -m app.cli recalculate-tiers``
+    and returns once it has finished.
+    """
+    try:
+        result = await run_in_threadpool(recalculate_risk_tiers, workers=workers, dry_run=dry_run)
+    except RecalculationInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not dry_run:
+        audit_writer.record(actor, "RECALCULATE", "risk_tier", details={"changes_by_tier": result.changes_by_tier})
+    return vars(result)
+
+@router.get("/cache/stats")
+async def get_score_cache_stats():
+    """Hit/miss counters and occupancy of the per-vendor score cache"""
+    return vendor_score_cache.stats()
+
+@router.get("/vendors", response_model=Page[VendorScore])
+async def get_vendor_risk_scores(
+    company_ids: Optional[List[int]] = Query(None, alias="company_id"),
+    risk_tier: Optional[str] = Query(None, pattern=RISK_TIER_PATTERN),
+    status: Optional[str] = None,
+    industry: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Score the whole portfolio, or a filtered subset, with one GROUP BY per page
+
+    Pages are keyed on company_id; pass next_cursor back to continue.
+    """
+    return await _vendor_scores_page(
+        calculate_vendor_risk_scores,
+        db,
+        cursor,
+        limit,
+        company_ids=company_ids,
+        risk_tier=risk_tier,
+        status=status,
+        industry=industry,
+    )
+
+@router.get("/vendors/weighted", response_model=Page[VendorScore])
+async def get_weighted_vendor_risk_scores(
+    company_ids: Optional[List[int]] = Query(None, alias="company_id"),
+    risk_tier: Optional[str] = Query(None, pattern=RISK_TIER_PATTERN),
+    status: Optional[str] = None,
+    industry: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Weighted, time-decayed scores for the portfolio or a filtered subset
+
+    Assessments are weighted by assessment_type and decayed by the age of
+    date_assessed (see the scoring_* settings). Pages are keyed on
+    company_id, as for /vendors.
+    """
+    return await _vendor_scores_page(
+        calculate_weighted_vendor_scores,
+        db,
+        cursor,
+        limit,
+        company_ids=company_ids,
+        risk_tier=risk_tier,
+        status=status,
+        industry=industry,
+    )
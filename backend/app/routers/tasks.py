@@ -1,44 +1,67 @@
 from datetime import datetime, timezone
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..models import Task
-from ..schemas import TaskCreate, TaskResponse, TaskUpdate
+from ..pagination import PageParams, paginate
+from ..schemas import Page, TaskCreate, TaskResponse, TaskUpdate
+from ..services.audit import AuditActor, audit_actor, audit_writer
+from ..services.export import EXPORT_FORMAT_PATTERN, export_response
 
 router = APIRouter(
     prefix="/tasks",
     tags=["tasks"]
 )
 
+TASK_STATUS_PATTERN = "^(PENDING|IN_PROGRESS|COMPLETED|OVERDUE)$"
+
+TASK_SORT_COLUMNS = {
+    "id": Task.id,
+}
+
 @router.post("/", response_model=TaskResponse)
-def create_task(task_data: TaskCreate, db: Session = Depends(get_db)):
+async def create_task(task_data: TaskCreate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Create a new task"""
     task = Task(**task_data.model_dump())
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    await db.commit()
+    await db.refresh(task)
+    audit_writer.record(actor, "CREATE", "task", task.id)
     return task
 
+@router.get("/export")
+async def export_tasks(export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    """Stream every task row as NDJSON or CSV"""
+    return export_response(Task, export_format, "tasks")
+
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task(task_id: int, db: Session = Depends(get_db)):
+async def get_task(task_id: int, db: AsyncSession = Depends(get_db)):
     """Get a task by ID"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = await db.get(Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
 
-@router.get("/", response_model=List[TaskResponse])
-def get_tasks(db: Session = Depends(get_db)):
-    """Get all tasks"""
-    return db.query(Task).all()
+@router.get("/", response_model=Page[TaskResponse])
+async def get_tasks(
+    status: Optional[str] = Query(None, pattern=TASK_STATUS_PATTERN),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a page of tasks, optionally only those with a given status"""
+    query = select(Task)
+    if status:
+        query = query.where(Task.status == status)
+    return await paginate(db, query, Task.id, TASK_SORT_COLUMNS, page)
 
 @router.put("/{task_id}", response_model=TaskResponse)
-def update_task(task_id: int, task_data: TaskUpdate, db: Session = Depends(get_db)):
+async def update_task(task_id: int, task_data: TaskUpdate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Update a task"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = await db.get(Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -46,17 +69,19 @@ def update_task(task_id: int, task_data: TaskUpdate, db: Session = Depends(get_d
     for field, value in update_data.items():
         setattr(task, field, value)
     
-    db.commit()
-    db.refresh(task)
+    await db.commit()
+    await db.refresh(task)
+    audit_writer.record(actor, "UPDATE", "task", task_id, {"fields": sorted(update_data)})
     return task
 
 @router.delete("/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_db)):
+async def delete_task(task_id: int, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Delete a task"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = await db.get(Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await db.commit()
+    audit_writer.record(actor, "DELETE", "task", task_id)
     return {"message": "Task deleted successfully"}
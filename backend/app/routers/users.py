@@ -1,34 +1,41 @@
 from datetime import datetime, timezone
-from typing import List
-
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..models import User
-from ..schemas import UserCreate, UserResponse, UserUpdate
-from ..security import get_password_hash, verify_password
+from ..pagination import PageParams, paginate
+from ..schemas import Page, UserCreate, UserResponse, UserUpdate
+from ..services.audit import AuditActor, audit_actor, audit_writer
+from ..services.password_hashing import password_hasher
+from ..services.user_cache import authenticated_user_cache
 
 router = APIRouter(
     prefix="/users",
     tags=["users"]
 )
 
+USER_SORT_COLUMNS = {
+    "id": User.id,
+    "username": User.username,
+}
+
 @router.post("/", response_model=UserResponse)
-def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user_data: UserCreate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Create a new user"""
     # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
-    if existing_user:
+    existing_user = await db.execute(select(User.id).where(User.username == user_data.username))
+    if existing_user.first():
         raise HTTPException(status_code=400, detail="Username already exists")
     
     # Check if email already exists
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
-    if existing_email:
+    existing_email = await db.execute(select(User.id).where(User.email == user_data.email))
+    if existing_email.first():
         raise HTTPException(status_code=400, detail="Email already exists")
     
     # Hash the password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     
     # Create user dict and remove password, add hashed_password
     user_dict = user_data.model_dump()
@@ -37,56 +44,65 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
     
     new_user = User(**user_dict)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    audit_writer.record(actor, "CREATE", "user", new_user.id)
     return new_user
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """Get a user by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
-@router.get("/", response_model=List[UserResponse])
-def get_users(db: Session = Depends(get_db)):
-    """Get all users"""
-    return db.query(User).all()
+@router.get("/", response_model=Page[UserResponse])
+async def get_users(page: PageParams = Depends(), db: AsyncSession = Depends(get_db)):
+    """Get a page of users"""
+    return await paginate(db, select(User), User.id, USER_SORT_COLUMNS, page)
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id: int, user_data: UserUpdate, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Update a user"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    previous_username = user.username
     update_data = user_data.model_dump(exclude_unset=True)
     print(f"Update data: {update_data}")  # Debugging statement
 
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await password_hasher.hash(update_data.pop("password"))
 
     if "username" in update_data:
-        existing_user = db.query(User).filter(User.username == update_data["username"]).first()
-        if existing_user and existing_user.id != user_id:
+        result = await db.execute(select(User.id).where(User.username == update_data["username"]))
+        existing_user_id = result.scalar()
+        if existing_user_id is not None and existing_user_id != user_id:
             raise HTTPException(status_code=400, detail="Username already exists")
 
     for field, value in update_data.items():
         setattr(user, field, value)
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    authenticated_user_cache.invalidate([previous_username, user.username])
     print(f"Updated user: {user}")  # Debugging statement
+    # Field names only: never values, which include the password hash
+    audit_writer.record(actor, "UPDATE", "user", user_id, {"fields": sorted(update_data)})
     return user
 
 @router.delete("/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db)):
+async def delete_user(user_id: int, actor: AuditActor = Depends(audit_actor), db: AsyncSession = Depends(get_db)):
     """Delete a user"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    db.delete(user)
-    db.commit()
+    username = user.username
+    await db.delete(user)
+    await db.commit()
+    authenticated_user_cache.invalidate([username])
+    audit_writer.record(actor, "DELETE", "user", user_id)
     return {"message": "User deleted successfully"}
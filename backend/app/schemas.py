@@ -4,13 +4,20 @@ This module contains all the Pydantic models used for API validation,
 serialization, and documentation. Keep this separate from SQLAlchemy ORM models.
 """
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel, Field
 
 # Constants for validation patterns
 RISK_TIER_PATTERN = "^(LOW|MEDIUM|HIGH|CRITICAL)$"
 
+T = TypeVar("T")
+
+# Pagination Schemas
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 # Company Schemas
 class CompanyBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
@@ -153,7 +160,7 @@ class DueDiligenceCreate(DueDiligenceBase):
 
 class DueDiligenceUpdate(BaseModel):
     request_details: Optional[str] = Field(None, min_length=1)
-    status: Optional[str] = Field(None, pattern="^(PENDING|APPROVED|REJECTED|COMPLETED)$")
+    status: Optional[str] = Field(None, pattern="^(PENDING|APPROVED|REJECTED|COMPLETED|OVERDUE)$")
     priority: Optional[str] = Field(None, pattern=RISK_TIER_PATTERN)
     due_date: Optional[datetime] = None
     assigned_to: Optional[int] = None
@@ -221,11 +228,89 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+# Scoring Schemas
+class VendorScore(BaseModel):
+    company_id: int
+    risk_score: float
+    assessment_count: int
+
+class ScoreHistoryPoint(BaseModel):
+    bucket_start: datetime
+    risk_score: Optional[float] = None
+    min_risk_score: Optional[float] = None
+    max_risk_score: Optional[float] = None
+    weighted_risk_score: Optional[float] = None
+    samples: int
+
+class VendorScoreHistoryResponse(BaseModel):
+    company_id: int
+    bucket: str
+    points: List[ScoreHistoryPoint]
+
+# Scoring Simulation Schemas
+class SimulationWeights(BaseModel):
+    internal: Optional[float] = Field(None, ge=0)
+    external: Optional[float] = Field(None, ge=0)
+    tiering: Optional[float] = Field(None, ge=0)
+
+class SimulationThresholds(BaseModel):
+    medium: Optional[float] = Field(None, ge=0, le=100)
+    high: Optional[float] = Field(None, ge=0, le=100)
+    critical: Optional[float] = Field(None, ge=0, le=100)
+
+class ScoringSimulationRequest(BaseModel):
+    """Candidate parameters; anything omitted keeps its current setting"""
+    weights: SimulationWeights = Field(default_factory=SimulationWeights)
+    half_life_days: Optional[float] = Field(None, ge=0)
+    thresholds: SimulationThresholds = Field(default_factory=SimulationThresholds)
+    top_n: int = Field(20, ge=0, le=1000)
+
+class TierMigration(BaseModel):
+    from_tier: Optional[str] = None
+    to_tier: str
+    count: int
+
+class ScoreMover(BaseModel):
+    company_id: int
+    name: Optional[str] = None
+    current_tier: Optional[str] = None
+    simulated_tier: str
+    baseline_score: Optional[float] = None
+    simulated_score: float
+    delta: Optional[float] = None
+
+class ScoringSimulationResponse(BaseModel):
+    vendors_scored: int
+    vendors_changing_tier: int
+    migrations: List[TierMigration]
+    top_movers: List[ScoreMover]
+    weights: Dict[str, float]
+    half_life_days: float
+    thresholds: Dict[str, float]
+
+# Audit Schemas
+class AuditLogResponse(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    action: str
+    resource_type: str
+    resource_id: Optional[int] = None
+    details: Optional[Dict] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
 # Authentication Schemas
 class LoginRequest(BaseModel):
     username: str = Field(..., min_length=1)
     password: str = Field(..., min_length=1)
 
+class TokenRevokeRequest(BaseModel):
+    access_token: str = Field(..., min_length=1)
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
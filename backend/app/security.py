@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -6,7 +7,8 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .config import settings
 from .database import get_db
@@ -16,7 +18,7 @@ ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.password_bcrypt_rounds)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
@@ -26,7 +28,8 @@ class TokenData(BaseModel):
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta if expires_delta else timedelta(minutes=15))
-    to_encode.update({"exp": expire})
+    # jti identifies the token for revocation
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -46,7 +49,14 @@ def verify_token(token: str):
             detail="Invalid token"
         )
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def decode_token_claims(token: str) -> Optional[dict]:
+    """Claims of a valid token, or None; never raises"""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -63,10 +73,26 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     
     # Import here to avoid circular imports
     from .models import User
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    from .services.token_revocation import token_revocation_list
+    from .services.user_cache import authenticated_user_cache
+
+    # Tokens issued before jti was added cannot be revoked; they expire on their own
+    jti = payload.get("jti")
+    if jti is not None and await token_revocation_list.is_revoked(db, jti):
+        raise credentials_exception
+
+    async def load_user():
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalars().first()
+        if user is not None:
+            db.expunge(user)
+        return user
+
+    user = await authenticated_user_cache.get_or_load(username, load_user)
+    if user is None or not user.is_active:
         raise credentials_exception
-    return user
+    # A session-bound copy, so the route cannot modify the cached instance
+    return await db.merge(user, load=False)
 
 def get_password_hash(password: str) -> str:
     """Hash a password using bcrypt"""
@@ -75,3 +101,12 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
+
+async def require_admin(current_user=Depends(get_current_user)):
+    """Dependency restricting a route to users with the ADMIN role"""
+    if current_user.role != "ADMIN":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
@@ -0,0 +1,237 @@
+"""
+Asynchronous, batched audit-log writer.
+
+Routes call audit_writer.record() after their own commit. That only puts an
+event on a bounded in-memory queue; a background task drains the queue and
+writes AuditLog rows with one multi-row INSERT per batch, flushing when
+batch_size events are waiting or flush_interval_ms after the first event of
+a batch arrived, whichever comes first. A request therefore never waits on
+an audit INSERT.
+
+On shutdown the lifespan hook calls stop(), which stops accepting events and
+flushes everything already queued before the database engine is disposed.
+Events recorded while the writer is not running (CLI, scripts) are ignored,
+and events arriving while the queue is full are dropped and counted rather
+than blocking the request; both show up in stats().
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import insert
+
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models import AuditLog
+from ..security import decode_token_claims
+
+logger = logging.getLogger(__name__)
+
+# Attempts per batch before its events are counted as dropped
+FLUSH_ATTEMPTS = 3
+
+# Delay between attempts after a failed flush
+FLUSH_RETRY_DELAY_SECONDS = 1.0
+
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class AuditActor:
+    """Who made a request, as far as can be told without a database read"""
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+
+
+def audit_actor(request: Request) -> AuditActor:
+    """
+    Dependency describing the caller of a mutating route
+
+    The user comes from the bearer token's claims when one is present and
+    valid; routes that do not require authentication record anonymous calls
+    with user_id None.
+    """
+    claims = {}
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        claims = decode_token_claims(token) or {}
+    user_agent = request.headers.get("user-agent")
+    return AuditActor(
+        user_id=claims.get("uid"),
+        username=claims.get("sub"),
+        ip_address=request.client.host if request.client else None,
+        user_agent=user_agent[:500] if user_agent else None,
+    )
+
+
+class AuditWriter:
+    """Bounded queue of audit events flushed in batches by one background task"""
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval_ms: float):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._task: Optional[asyncio.Task] = None
+        self._accepting = False
+        # Events taken off the queue but not yet written
+        self._batch: List[Dict[str, Any]] = []
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self.last_batch_size = 0
+
+    def record(
+        self,
+        actor: AuditActor,
+        action: str,
+        resource_type: str,
+        resource_id: Optional[int] = None,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Queue one audit event; never blocks and never raises"""
+        if not self._accepting:
+            return
+        if actor.username is not None:
+            details = {**(details or {}), "username": actor.username}
+        event = {
+            "user_id": actor.user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": details,
+            "ip_address": actor.ip_address,
+            "user_agent": actor.user_agent,
+            "created_at": datetime.now(timezone.utc),
+        }
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(f"Audit queue full, dropped {action} {resource_type} {resource_id}")
+            return
+        self.enqueued += 1
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert one batch, retrying transient failures"""
+        for attempt in range(1, FLUSH_ATTEMPTS + 1):
+            started = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(insert(AuditLog), batch)
+                    await db.commit()
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Audit flush of {len(batch)} events failed (attempt {attempt}): {e}")
+                if attempt < FLUSH_ATTEMPTS:
+                    await asyncio.sleep(FLUSH_RETRY_DELAY_SECONDS)
+                continue
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self.flushes += 1
+            self.written += len(batch)
+            self.last_batch_size = len(batch)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+            return
+        self.dropped += len(batch)
+
+    async def _next_batch(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Wait for an event, then collect until batch_size events or the flush
+        interval has passed
+
+        Returns:
+            (batch, whether stop() was requested)
+        """
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = self._batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                event = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if event is _STOP:
+                return batch, True
+            batch.append(event)
+        return batch, False
+
+    async def _run(self) -> None:
+        while True:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+                self._batch = []
+            if stopping:
+                return
+
+    def start(self) -> None:
+        self._accepting = True
+        self._task = asyncio.create_task(self._run())
+
+    async def _drain(self) -> None:
+        # Queued after every pending event, so the loop writes them first
+        await self._queue.put(_STOP)
+        await self._task
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting events and flush everything already queued"""
+        if self._task is None:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Audit writer did not drain within {timeout}s, {self._queue.qsize()} events lost")
+        self._task = None
+        if self.dropped:
+            logger.warning(f"Audit writer dropped {self.dropped} events since startup")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "queue_depth": self._queue.qsize(),
+            "batch_pending": len(self._batch),
+            "queue_maxsize": self.maxsize,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000.0,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+
+# Global audit writer instance
+audit_writer = AuditWriter(
+    maxsize=settings.audit_queue_maxsize,
+    batch_size=settings.audit_batch_size,
+    flush_interval_ms=settings.audit_flush_interval_ms,
+)
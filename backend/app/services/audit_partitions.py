@@ -0,0 +1,321 @@
+"""
+Monthly partitions of the audit log and their archival.
+
+On PostgreSQL ``audit_logs`` is a range-partitioned table (see migration
+f3a8c1d5b926): one partition per calendar month of ``created_at``, named
+``audit_logs_yYYYYmMM``, plus ``audit_logs_default`` catching anything no
+monthly partition covers. Inserts and time-bounded queries only touch the
+months they need, and retiring a month is a DETACH + DROP instead of a
+multi-million-row DELETE.
+
+* ensure_audit_partitions() creates the months ahead of time. It runs at
+  startup and should also run from cron (``python -m app.cli
+  ensure-audit-partitions``) so a long-lived process never falls back to
+  the default partition; rows that did land there are moved into the
+  month's partition when it is created.
+* archive_audit_partitions() writes every partition older than the
+  retention window to a gzip-compressed NDJSON file, verifies the row
+  count, then detaches and drops it.
+* restore_audit_partition() loads an archive back as an attached partition
+  so it can be queried through audit_logs again. Restored months are
+  archived again, unchanged, by the next archive run.
+
+Other databases keep a plain table; these functions raise
+AuditPartitioningUnavailable there. Everything here is blocking and uses
+the sync engine; call from the CLI or a thread.
+"""
+import gzip
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Iterator, List, Optional
+
+from sqlalchemy import column, insert, select, table, text
+
+from ..config import settings
+from ..database import engine
+from ..models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_TABLE = AuditLog.__tablename__
+DEFAULT_PARTITION = f"{AUDIT_TABLE}_default"
+PARTITION_NAME_PATTERN = re.compile(rf"^{AUDIT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+ARCHIVE_SUFFIX = ".ndjson.gz"
+
+# Rows per server-side cursor round trip when archiving, and per INSERT
+# when restoring
+ARCHIVE_BATCH_SIZE = 5000
+
+
+class AuditPartitioningUnavailable(RuntimeError):
+    """Raised when audit_logs is not a partitioned PostgreSQL table"""
+
+
+@dataclass
+class AuditPartition:
+    name: str
+    month: Optional[date]
+    estimated_rows: Optional[int]
+    size_bytes: int
+
+
+@dataclass
+class ArchivedPartition:
+    name: str
+    month: date
+    rows: int
+    path: str
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{AUDIT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """The month a partition covers, from its name; None for the default"""
+    match = PARTITION_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def archive_path(archive_dir: str, month: date) -> str:
+    return os.path.join(archive_dir, partition_name(month) + ARCHIVE_SUFFIX)
+
+
+def _require_partitioned(conn) -> None:
+    if conn.dialect.name != "postgresql":
+        raise AuditPartitioningUnavailable(f"{AUDIT_TABLE} is only partitioned on PostgreSQL")
+    partitioned = conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": AUDIT_TABLE},
+    ).first()
+    if partitioned is None:
+        raise AuditPartitioningUnavailable(f"{AUDIT_TABLE} is not partitioned; run the alembic migrations")
+
+
+def _attached_partitions(conn) -> List[AuditPartition]:
+    rows = conn.execute(text("""
+        SELECT child.relname, child.reltuples::bigint, pg_total_relation_size(child.oid)
+        FROM pg_inherits
+        JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(:table)
+        ORDER BY child.relname
+    """), {"table": AUDIT_TABLE}).all()
+    return [
+        AuditPartition(
+            name=name,
+            month=partition_month(name),
+            # reltuples is -1 until the partition has been analyzed
+            estimated_rows=estimate if estimate >= 0 else None,
+            size_bytes=size,
+        )
+        for name, estimate, size in rows
+    ]
+
+
+def _create_month_partition(conn, month: date) -> None:
+    """
+    Create one month's partition, moving any rows for that month out of
+    the default partition first (PostgreSQL refuses otherwise)
+    """
+    name = partition_name(month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    in_month = f"created_at >= '{lower}' AND created_at < '{upper}'"
+    stranded = conn.execute(text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month} LIMIT 1")).first()
+    if stranded is None:
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {AUDIT_TABLE} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        ))
+        return
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {AUDIT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_month}"))
+    conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}"))
+    conn.execute(text(
+        f"ALTER TABLE {AUDIT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    logger.warning(f"Moved {AUDIT_TABLE} rows for {month:%Y-%m} out of {DEFAULT_PARTITION} into {name}")
+
+
+def list_audit_partitions() -> List[AuditPartition]:
+    """Attached partitions, monthly ones in date order and the default last"""
+    with engine.connect() as conn:
+        _require_partitioned(conn)
+        partitions = _attached_partitions(conn)
+    return sorted(partitions, key=lambda partition: (partition.month is None, partition.month or date.min))
+
+
+def list_audit_archives(archive_dir: Optional[str] = None) -> List[date]:
+    """Months with an archive file in archive_dir"""
+    archive_dir = archive_dir or settings.audit_archive_dir
+    if not os.path.isdir(archive_dir):
+        return []
+    months = []
+    for filename in os.listdir(archive_dir):
+        if filename.endswith(ARCHIVE_SUFFIX):
+            month = partition_month(filename[:-len(ARCHIVE_SUFFIX)])
+            if month is not None:
+                months.append(month)
+    return sorted(months)
+
+
+def ensure_audit_partitions(months_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+    """
+    Create the partitions for the current month and the next months_ahead
+
+    Returns:
+        Names of the partitions created
+    """
+    if months_ahead is None:
+        months_ahead = settings.audit_partition_months_ahead
+    current = month_start(today or datetime.now(timezone.utc).date())
+    created = []
+    with engine.begin() as conn:
+        _require_partitioned(conn)
+        existing = {partition.name for partition in _attached_partitions(conn)}
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if partition_name(month) not in existing:
+                _create_month_partition(conn, month)
+                created.append(partition_name(month))
+    if created:
+        logger.info(f"Created audit log partitions {', '.join(created)}")
+    return created
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _export_partition(conn, name: str, path: str) -> int:
+    """Write a partition's rows to a gzip NDJSON file atomically"""
+    # Typed like audit_logs so JSON and timestamps decode the same way
+    source = table(name, *[column(c.name, c.type) for c in AuditLog.__table__.columns])
+    columns = [c.name for c in source.columns]
+    result = conn.execution_options(yield_per=ARCHIVE_BATCH_SIZE).execute(
+        select(source).order_by(source.c.id)
+    )
+    rows = 0
+    partial = path + ".partial"
+    with gzip.open(partial, "wt", encoding="utf-8") as archive:
+        for partition in result.partitions():
+            for row in partition:
+                archive.write(json.dumps(dict(zip(columns, row)), default=_json_default))
+                archive.write("\n")
+            rows += len(partition)
+    with open(partial, "rb") as archive:
+        os.fsync(archive.fileno())
+    os.replace(partial, path)
+    return rows
+
+
+def archive_audit_partitions(
+    retention_months: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    dry_run: bool = False,
+    today: Optional[date] = None,
+) -> List[ArchivedPartition]:
+    """
+    Export and drop every monthly partition that ended more than
+    retention_months ago
+
+    Each partition is exported and verified before it is dropped, one at a
+    time, so an interrupted run loses nothing: rerunning it rewrites the
+    file of the partition it was working on.
+
+    Returns:
+        The partitions archived (or that would be, with dry_run)
+    """
+    if retention_months is None:
+        retention_months = settings.audit_retention_months
+    archive_dir = archive_dir or settings.audit_archive_dir
+    cutoff = add_months(month_start(today or datetime.now(timezone.utc).date()), -retention_months)
+
+    with engine.connect() as conn:
+        _require_partitioned(conn)
+        expired = [
+            partition for partition in _attached_partitions(conn)
+            if partition.month is not None and partition.month < cutoff
+        ]
+    expired.sort(key=lambda partition: partition.month)
+
+    archived = []
+    if not dry_run and expired:
+        os.makedirs(archive_dir, exist_ok=True)
+    for partition in expired:
+        path = archive_path(archive_dir, partition.month)
+        if dry_run:
+            archived.append(ArchivedPartition(partition.name, partition.month, partition.estimated_rows or 0, path))
+            continue
+        with engine.begin() as conn:
+            # Block writers to this month until it is gone
+            conn.execute(text(f"LOCK TABLE {partition.name} IN SHARE MODE"))
+            rows = _export_partition(conn, partition.name, path)
+            stored = conn.execute(text(f"SELECT count(*) FROM {partition.name}")).scalar_one()
+            if stored != rows:
+                raise RuntimeError(f"Archive of {partition.name} has {rows} rows, the partition {stored}")
+            conn.execute(text(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {partition.name}"))
+            conn.execute(text(f"DROP TABLE {partition.name}"))
+        logger.info(f"Archived {rows} audit log rows from {partition.name} to {path}")
+        archived.append(ArchivedPartition(partition.name, partition.month, rows, path))
+    return archived
+
+
+def _read_archive(path: str) -> Iterator[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            record = json.loads(line)
+            if record.get("created_at") is not None:
+                record["created_at"] = datetime.fromisoformat(record["created_at"])
+            yield record
+
+
+def restore_audit_partition(month: date, archive_dir: Optional[str] = None) -> int:
+    """
+    Re-attach an archived month so it can be queried through audit_logs
+
+    Returns:
+        Rows restored
+
+    Raises:
+        FileNotFoundError: No archive for that month
+        ValueError: The month's partition is already attached
+    """
+    month = month_start(month)
+    path = archive_path(archive_dir or settings.audit_archive_dir, month)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No audit archive at {path}")
+
+    rows = 0
+    with engine.begin() as conn:
+        _require_partitioned(conn)
+        if partition_name(month) in {partition.name for partition in _attached_partitions(conn)}:
+            raise ValueError(f"{partition_name(month)} is already attached")
+        _create_month_partition(conn, month)
+        batch = []
+        for record in _read_archive(path):
+            batch.append(record)
+            if len(batch) >= ARCHIVE_BATCH_SIZE:
+                conn.execute(insert(AuditLog.__table__), batch)
+                rows += len(batch)
+                batch = []
+        if batch:
+            conn.execute(insert(AuditLog.__table__), batch)
+            rows += len(batch)
+    logger.info(f"Restored {rows} audit log rows into {partition_name(month)} from {path}")
+    return rows
@@ -10,6 +10,7 @@ from azure.storage.blob import (BlobSasPermissions, BlobServiceClient,
                                 generate_blob_sas)
 
 from ..config import settings
+from ..metrics import set_external_call_outcome, track_external_call
 
 logger = logging.getLogger(__name__)
 
@@ -80,6 +81,7 @@ class AzureStorageService:
             logger.error(f"Failed to generate SAS token: {e}")
             raise
     
+    @track_external_call("azure_storage")
     def get_upload_url(self, file_name: str, content_type: str) -> Dict[str, Any]:
         """
         Get a secure upload URL with SAS token for file upload
@@ -114,6 +116,7 @@ class AzureStorageService:
             logger.error(f"Failed to generate upload URL: {e}")
             raise
     
+    @track_external_call("azure_storage")
     def get_download_url(self, blob_name: str, expiry_hours: int = 24) -> str:
         """
         Get a secure download URL with SAS token
@@ -136,6 +139,7 @@ class AzureStorageService:
             logger.error(f"Failed to generate download URL: {e}")
             raise
     
+    @track_external_call("azure_storage")
     def delete_blob(self, blob_name: str) -> bool:
         """
         Delete a blob from storage
@@ -155,8 +159,10 @@ class AzureStorageService:
             
         except AzureError as e:
             logger.error(f"Failed to delete blob {blob_name}: {e}")
+            set_external_call_outcome("error")
             return False
     
+    @track_external_call("azure_storage")
     def blob_exists(self, blob_name: str) -> bool:
         """
         Check if a blob exists
@@ -172,8 +178,10 @@ class AzureStorageService:
             return blob_client.exists()
         except Exception as e:
             logger.error(f"Failed to check blob existence: {e}")
+            set_external_call_outcome("error")
             return False
     
+    @track_external_call("azure_storage")
     def get_blob_metadata(self, blob_name: str) -> Optional[Dict[str, Any]]:
         """
         Get blob metadata
@@ -199,6 +207,7 @@ class AzureStorageService:
             
         except Exception as e:
             logger.error(f"Failed to get blob metadata: {e}")
+            set_external_call_outcome("error")
             return None
 
 # Global instance
@@ -10,6 +10,7 @@ from dapr.clients.grpc._response import GetStateResponse
 from dapr import DaprClient
 
 from ..config import settings
+from ..metrics import set_external_call_outcome, track_external_call
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,7 @@ class DaprService:
         if not self.enabled:
             logger.warning("Dapr is disabled in configuration")
     
+    @track_external_call("dapr")
     async def invoke_service(self, service_id: str, method: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Invoke another service via Dapr
@@ -39,6 +41,7 @@ class DaprService:
         """
         if not self.enabled:
             logger.warning("Dapr service invocation skipped - Dapr is disabled")
+            set_external_call_outcome("skipped")
             return {"error": "Dapr is disabled"}
         
         try:
@@ -55,6 +58,7 @@ class DaprService:
             logger.error(f"Failed to invoke service {service_id}: {e}")
             raise
     
+    @track_external_call("dapr")
     async def save_state(self, store_name: str, key: str, value: Any, etag: str = None) -> bool:
         """
         Save state to Dapr state store
@@ -70,6 +74,7 @@ class DaprService:
         """
         if not self.enabled:
             logger.warning("Dapr state save skipped - Dapr is disabled")
+            set_external_call_outcome("skipped")
             return False
         
         try:
@@ -85,8 +90,10 @@ class DaprService:
             
         except Exception as e:
             logger.error(f"Failed to save state to {store_name}: {e}")
+            set_external_call_outcome("error")
             return False
     
+    @track_external_call("dapr")
     async def get_state(self, store_name: str, key: str) -> Optional[Dict[str, Any]]:
         """
         Get state from Dapr state store
@@ -100,6 +107,7 @@ class DaprService:
         """
         if not self.enabled:
             logger.warning("Dapr state get skipped - Dapr is disabled")
+            set_external_call_outcome("skipped")
             return None
         
         try:
@@ -117,8 +125,10 @@ class DaprService:
                 
         except Exception as e:
             logger.error(f"Failed to get state from {store_name}: {e}")
+            set_external_call_outcome("error")
             return None
     
+    @track_external_call("dapr")
     async def delete_state(self, store_name: str, key: str, etag: str = None) -> bool:
         """
         Delete state from Dapr state store
@@ -133,6 +143,7 @@ class DaprService:
         """
         if not self.enabled:
             logger.warning("Dapr state delete skipped - Dapr is disabled")
+            set_external_call_outcome("skipped")
             return False
         
         try:
@@ -147,8 +158,10 @@ class DaprService:
             
         except Exception as e:
             logger.error(f"Failed to delete state from {store_name}: {e}")
+            set_external_call_outcome("error")
             return False
     
+    @track_external_call("dapr")
     async def publish_event(self, pubsub_name: str, topic: str, data: Dict[str, Any]) -> bool:
         """
         Publish event to Dapr pub/sub
@@ -163,6 +176,7 @@ class DaprService:
         """
         if not self.enabled:
             logger.warning("Dapr event publish skipped - Dapr is disabled")
+            set_external_call_outcome("skipped")
             return False
         
         try:
@@ -178,8 +192,10 @@ class DaprService:
             
         except Exception as e:
             logger.error(f"Failed to publish event to {pubsub_name}/{topic}: {e}")
+            set_external_call_outcome("error")
             return False
     
+    @track_external_call("dapr")
     async def get_secret(self, store_name: str, key: str) -> Optional[str]:
         """
         Get secret from Dapr secret store
@@ -193,6 +209,7 @@ class DaprService:
         """
         if not self.enabled:
             logger.warning("Dapr secret get skipped - Dapr is disabled")
+            set_external_call_outcome("skipped")
             return None
         
         try:
@@ -210,8 +227,10 @@ class DaprService:
                 
         except Exception as e:
             logger.error(f"Failed to get secret from {store_name}: {e}")
+            set_external_call_outcome("error")
             return None
     
+    @track_external_call("dapr")
     async def save_state_transaction(self, store_name: str, operations: List[Dict[str, Any]]) -> bool:
         """
         Execute a state transaction with multiple operations
@@ -225,6 +244,7 @@ class DaprService:
         """
         if not self.enabled:
             logger.warning("Dapr state transaction skipped - Dapr is disabled")
+            set_external_call_outcome("skipped")
             return False
         
         try:
@@ -266,6 +286,7 @@ class DaprService:
             
         except Exception as e:
             logger.error(f"Failed to execute state transaction on {store_name}: {e}")
+            set_external_call_outcome("error")
             return False
 
 # Global instance
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from ..database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+
+# Rows fetched per server-side cursor round trip
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _to_primitive(value: Any) -> Any:
+    """Render column values the same way in NDJSON and CSV"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def stream_table(model, export_format: str) -> AsyncIterator[bytes]:
+    """
+    Stream every row of a model's table as NDJSON or CSV
+
+    Selects plain columns (no ORM identity map) through a server-side cursor
+    and encodes one batch at a time, so memory stays flat regardless of the
+    table size. Opens its own session because the response body is produced
+    after the request handler has returned.
+
+    Args:
+        model: SQLAlchemy model whose table is exported
+        export_format: 'ndjson' or 'csv'
+
+    Yields:
+        Encoded chunks of the export body
+    """
+    columns = list(model.__table__.columns)
+    names = [column.name for column in columns]
+    query = (
+        select(*columns)
+        .order_by(model.__table__.c.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(names)
+        yield buffer.getvalue().encode()
+
+    rows_exported = 0
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            buffer = io.StringIO()
+            if export_format == "csv":
+                writer = csv.writer(buffer)
+                for row in partition:
+                    writer.writerow([_to_primitive(value) for value in row])
+            else:
+                for row in partition:
+                    record = {name: _to_primitive(value) for name, value in zip(names, row)}
+                    buffer.write(json.dumps(record, default=str))
+                    buffer.write("\n")
+            rows_exported += len(partition)
+            yield buffer.getvalue().encode()
+
+    logger.info(f"Exported {rows_exported} rows from {model.__tablename__} as {export_format}")
+
+
+def export_response(model, export_format: str, filename: str) -> StreamingResponse:
+    """Build a streaming download response for a table export"""
+    return StreamingResponse(
+        stream_table(model, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,90 @@
+"""
+Periodic overdue sweep for tasks and due-diligence requests.
+
+One set-based UPDATE per table flips every open row whose due_date has
+passed to OVERDUE. Both statements are answered by the (status, due_date)
+indexes, so a sweep touches only the rows it changes and "overdue" becomes
+a plain indexed status filter for the list endpoints.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models import DueDiligenceRequest, Task
+
+logger = logging.getLogger(__name__)
+
+OVERDUE = "OVERDUE"
+
+# Statuses that become OVERDUE once due_date has passed
+OPEN_TASK_STATUSES = ("PENDING", "IN_PROGRESS")
+OPEN_DUE_DILIGENCE_STATUSES = ("PENDING", "APPROVED")
+
+
+async def sweep_overdue(db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Mark open tasks and due-diligence requests past their due date as
+    OVERDUE, in one transaction
+
+    Returns:
+        Rows changed per table
+    """
+    now = now or datetime.now(timezone.utc)
+    changed = {}
+    for name, model, open_statuses in [
+        ("tasks", Task, OPEN_TASK_STATUSES),
+        ("due_diligence_requests", DueDiligenceRequest, OPEN_DUE_DILIGENCE_STATUSES),
+    ]:
+        result = await db.execute(
+            update(model)
+            .where(model.status.in_(open_statuses), model.due_date < now)
+            .values(status=OVERDUE)
+            .execution_options(synchronize_session=False)
+        )
+        changed[name] = result.rowcount
+    await db.commit()
+    return changed
+
+
+class OverdueSweeper:
+    """Runs sweep_overdue every interval seconds in the background"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last_run: Optional[datetime] = None
+        self.last_changed: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    self.last_changed = await sweep_overdue(db)
+                self.last_run = datetime.now(timezone.utc)
+                if any(self.last_changed.values()):
+                    logger.info(f"Overdue sweep marked {self.last_changed}")
+            except Exception as e:
+                logger.error(f"Overdue sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global overdue sweeper instance
+overdue_sweeper = OverdueSweeper(interval=settings.overdue_sweep_interval_seconds)
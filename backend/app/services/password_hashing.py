@@ -0,0 +1,99 @@
+"""
+Password hashing off the shared threadpool.
+
+bcrypt costs hundreds of milliseconds of CPU per call. Run through
+run_in_threadpool, a burst of logins occupies the threadpool that FastAPI
+also uses for every sync route and dependency (PageParams, audit_actor, ...),
+so unrelated requests queue behind hashes. Hashing and verification run
+here instead, on a small dedicated executor. At most ``workers`` calls are
+in flight; further callers wait on a semaphore for at most queue_timeout
+seconds and then get PasswordHashingBusy, which routes turn into a 503.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..config import settings
+from ..security import pwd_context
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(RuntimeError):
+    """Raised when no hashing worker frees up within the queue timeout"""
+
+
+class PasswordHasher:
+    """Dedicated, size-limited executor for bcrypt hashing and verification"""
+
+    def __init__(self, workers: int, queue_timeout: float):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        # Created on first use, so the hasher works again after shutdown()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = asyncio.Semaphore(workers)
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise PasswordHashingBusy("Password hashing is saturated, retry shortly")
+        finally:
+            self.waiting -= 1
+
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self.in_flight += 1
+        future = self._executor.submit(fn, *args)
+        # The slot is held until the hash itself finishes, even if the
+        # request awaiting it is cancelled first
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self.completed += 1
+        self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password; if it matches a hash made with outdated settings
+        (e.g. a lower bcrypt cost), also return a fresh hash to store
+
+        Returns:
+            (matches, replacement hash or None)
+        """
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads; hashes still queued are cancelled"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    queue_timeout=settings.password_hash_queue_timeout_seconds,
+)
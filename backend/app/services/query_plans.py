@@ -0,0 +1,270 @@
+"""
+Query-plan regression check.
+
+Seeds an empty database, replays the API's read and write routes in-process,
+captures every statement they send to the database and runs EXPLAIN on each
+one. A statement whose plan falls back to a full table scan is reported as a
+failure, so a missing index shows up before it reaches production data
+volumes.
+"""
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import event, func, select
+
+from ..database import AsyncSessionLocal, async_engine
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api/v1"
+
+# Statements that are plannable and worth checking
+EXPLAINABLE = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+# Requests replayed against the seeded database. List routes are fetched with
+# limit=1 and then once more with the returned cursor, so both the first page
+# and the keyset predicate are planned. Placeholders are filled from the seed.
+PLAN_PROBES: List[Tuple[str, str, Dict[str, Any]]] = [
+    ("GET", "/companies/", {"sort": "id"}),
+    ("GET", "/companies/", {"sort": "-name"}),
+    ("GET", "/companies/{company_id}", {}),
+    ("GET", "/assessments/", {"sort": "id"}),
+    ("GET", "/assessments/", {"sort": "-date_assessed"}),
+    ("GET", "/assessments/{assessment_id}", {}),
+    ("GET", "/tasks/", {"sort": "-id"}),
+    ("GET", "/tasks/", {"status": "OVERDUE"}),
+    ("GET", "/tasks/{task_id}", {}),
+    ("GET", "/due_diligence/", {"sort": "request_date"}),
+    ("GET", "/due_diligence/", {"status": "OVERDUE", "sort": "request_date"}),
+    ("GET", "/due_diligence/{request_id}", {}),
+    ("GET", "/engagements/", {}),
+    ("GET", "/engagements/{engagement_id}", {}),
+    ("GET", "/users/", {"sort": "username"}),
+    ("GET", "/users/{user_id}", {}),
+    ("GET", "/auth/me", {}),
+    ("GET", "/files/company/{company_id}", {}),
+    ("GET", "/files/company/{company_id}", {"document_type": "CONTRACT"}),
+    ("GET", "/scoring/vendor/{company_id}", {}),
+    ("GET", "/scoring/vendors", {"limit": 1}),
+    ("GET", "/scoring/vendors", {"risk_tier": "MEDIUM", "limit": 1}),
+    ("GET", "/scoring/vendors/weighted", {"limit": 1}),
+    ("GET", "/scoring/vendor/{company_id}/history", {"bucket": "week"}),
+    ("GET", "/scoring/vendor/{company_id}/history", {"from": "2020-01-01T00:00:00", "to": "2030-01-01T00:00:00"}),
+    ("GET", "/audit/", {}),
+    ("GET", "/audit/", {"resource_type": "company", "resource_id": "{company_id}"}),
+    ("GET", "/audit/", {"user_id": "{user_id}", "from": "2020-01-01T00:00:00", "to": "2030-01-01T00:00:00"}),
+    # The seed writes no score totals, so this also plans the first-write
+    # seeding in record_score_change
+    ("PUT", "/assessments/{assessment_id}", {"json": {"risk_score": 55.0}}),
+    ("PUT", "/tasks/{task_id}", {"json": {"priority": "HIGH"}}),
+    ("DELETE", "/tasks/{task_id}", {}),
+    ("DELETE", "/companies/{delete_company_id}", {}),
+]
+
+
+@dataclass
+class PlanResult:
+    """EXPLAIN outcome for one distinct statement"""
+    statement: str
+    plan: List[str]
+    full_scans: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.full_scans
+
+
+def _is_bounded_page(statement: str, sorts: bool) -> bool:
+    """
+    An unfiltered ORDER BY ... LIMIT reads one page, not the table, but only
+    if the plan reads rows in index or rowid order. A sort step means every
+    row is read and sorted first: the missing sort-key index this check is
+    for.
+    """
+    upper = " ".join(statement.upper().split())
+    return not sorts and " LIMIT " in upper and " WHERE " not in upper
+
+
+def _sqlite_full_scans(rows) -> Tuple[List[str], List[str], bool]:
+    details = [row[-1] for row in rows]
+    scans = [d for d in details if d.startswith("SCAN ") and " USING " not in d]
+    # "USE TEMP B-TREE FOR ORDER BY" (or GROUP BY / DISTINCT)
+    sorts = any(d.startswith("USE TEMP B-TREE") for d in details)
+    return details, scans, sorts
+
+
+def _postgres_full_scans(plan_json) -> Tuple[List[str], List[str], bool]:
+    details: List[str] = []
+    scans: List[str] = []
+
+    def walk(node):
+        label = node["Node Type"]
+        if "Relation Name" in node:
+            label += f" on {node['Relation Name']}"
+        details.append(label)
+        if node["Node Type"] == "Seq Scan":
+            scans.append(label)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    if isinstance(plan_json, str):
+        plan_json = json.loads(plan_json)
+    walk(plan_json[0]["Plan"])
+    return details, scans, "Sort" in details
+
+
+async def explain(statement: str, parameters) -> PlanResult:
+    """Run EXPLAIN for a captured DBAPI statement on the async engine"""
+    async with async_engine.connect() as conn:
+        if async_engine.dialect.name == "postgresql":
+            # Tiny seed tables make seq scans look cheap; only fall back to
+            # one when no index can answer the query at all
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            details, scans, sorts = _postgres_full_scans(result.scalar())
+        else:
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            details, scans, sorts = _sqlite_full_scans(result.fetchall())
+        await conn.rollback()
+
+    if scans and _is_bounded_page(statement, sorts):
+        scans = []
+    return PlanResult(statement=statement, plan=details, full_scans=scans)
+
+
+async def seed_database() -> Dict[str, int]:
+    """Insert a small fixture graph and return the ids used by PLAN_PROBES"""
+    from .. import models
+    from ..security import get_password_hash
+
+    async with AsyncSessionLocal() as db:
+        existing = await db.execute(select(func.count()).select_from(models.Company))
+        if existing.scalar():
+            raise RuntimeError("Refusing to seed a non-empty database; point DATABASE_URL at a scratch database")
+
+        now = datetime.now(timezone.utc)
+        user = models.User(
+            username="plan-check",
+            email="plan-check@example.com",
+            hashed_password=get_password_hash("plan-check-password"),
+            role="ADMIN",
+        )
+        db.add(user)
+        companies = [models.Company(name=f"Plan Check Vendor {i}") for i in range(4)]
+        db.add_all(companies)
+        await db.flush()
+
+        for i, company in enumerate(companies):
+            for j, assessment_type in enumerate(["INTERNAL", "EXTERNAL", "TIERING"]):
+                db.add(models.ThirdPartyRiskAssessment(
+                    company_id=company.id,
+                    assessor_id=user.id,
+                    risk_score=10.0 * i + j,
+                    assessment_type=assessment_type,
+                    date_assessed=now - timedelta(days=30 * j),
+                ))
+            db.add(models.Task(company_id=company.id, task_description="Review", due_date=now))
+            db.add(models.DueDiligenceRequest(company_id=company.id, request_details="Request", request_date=now))
+            if company is not companies[-1]:
+                # Engagement has no cascade from Company, so keep the vendor
+                # deleted by the DELETE probe free of them
+                db.add(models.Engagement(company_id=company.id, name="Engagement"))
+            db.add(models.CompanyContact(company_id=company.id, name="Contact"))
+            for action in ["CREATE", "UPDATE"]:
+                db.add(models.AuditLog(
+                    user_id=user.id,
+                    action=action,
+                    resource_type="company",
+                    resource_id=company.id,
+                    created_at=now,
+                ))
+            db.add(models.Document(
+                company_id=company.id,
+                file_name="doc.pdf",
+                original_name="doc.pdf",
+                blob_name=f"plan-check/{company.id}.pdf",
+                content_type="application/pdf",
+                file_size=1024,
+                document_type="CONTRACT",
+                uploaded_by=user.id,
+            ))
+        await db.flush()
+
+        ids = {
+            "user_id": user.id,
+            "company_id": companies[0].id,
+            "delete_company_id": companies[-1].id,
+        }
+        for key, model in [
+            ("assessment_id", models.ThirdPartyRiskAssessment),
+            ("task_id", models.Task),
+            ("request_id", models.DueDiligenceRequest),
+            ("engagement_id", models.Engagement),
+        ]:
+            result = await db.execute(
+                select(model.id).where(model.company_id == companies[0].id).limit(1)
+            )
+            ids[key] = result.scalar()
+        await db.commit()
+    return ids
+
+
+async def check_query_plans(app) -> List[PlanResult]:
+    """
+    Replay PLAN_PROBES against a freshly seeded database and EXPLAIN every
+    statement they issue
+
+    Returns:
+        One PlanResult per distinct statement, in first-seen order
+    """
+    from ..security import create_access_token
+
+    captured: Dict[str, Any] = {}
+    capturing = False
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if capturing and not executemany and EXPLAINABLE.match(statement):
+            captured.setdefault(statement, parameters)
+
+    try:
+        async with app.router.lifespan_context(app):
+            ids = await seed_database()
+            token = create_access_token({"sub": "plan-check", "role": "ADMIN"})
+            headers = {"Authorization": f"Bearer {token}"}
+
+            event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+            try:
+                capturing = True
+                async with httpx.AsyncClient(app=app, base_url="http://plan-check") as client:
+                    for method, path, options in PLAN_PROBES:
+                        url = API_PREFIX + path.format(**ids)
+                        params = {
+                            key: value.format(**ids) if isinstance(value, str) else value
+                            for key, value in options.items() if key != "json"
+                        }
+                        if method == "GET" and path.endswith("/"):
+                            params["limit"] = 1
+                        response = await client.request(
+                            method, url, params=params, json=options.get("json"), headers=headers
+                        )
+                        if response.status_code >= 400:
+                            raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text}")
+                        next_cursor: Optional[str] = None
+                        if method == "GET" and isinstance(response.json(), dict):
+                            next_cursor = response.json().get("next_cursor")
+                        if next_cursor:
+                            await client.get(url, params={**params, "cursor": next_cursor}, headers=headers)
+                capturing = False
+            finally:
+                event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+            return [await explain(statement, parameters) for statement, parameters in captured.items()]
+    finally:
+        # The lifespan shutdown hook is skipped when a probe raises; release
+        # the pool here so aiosqlite's worker thread cannot keep us alive
+        await async_engine.dispose()
@@ -0,0 +1,205 @@
+"""
+In-process scheduler for reassessment follow-up tasks.
+
+Upcoming ``next_assessment_date`` values live in a min-heap keyed on due
+time. The heap is filled once at startup and then kept current by the
+assessment routes (schedule / unschedule after each write), so nothing
+rescans the assessment table on a timer. When the earliest date falls due
+the scheduler creates a follow-up Task for the assessment's vendor.
+
+Rescheduling does not search the heap: the latest due time per assessment
+is kept in a dict and stale heap entries are skipped when they surface.
+
+A follow-up is the Task with the assessment's id and reassessment_date
+equal to its next_assessment_date. reassessment_date is not editable, so
+users moving the task's due date do not make it look missing, and a unique
+index on (assessment_id, reassessment_date) keeps restarts and several API
+workers running the scheduler from creating it twice: a worker losing that
+race has its batch rolled back and retried, when the follow-up is found.
+The task is due REASSESSMENT_TASK_DUE_DAYS after it is created.
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, select
+
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models import Task, ThirdPartyRiskAssessment
+
+logger = logging.getLogger(__name__)
+
+Assessment = ThirdPartyRiskAssessment
+
+# Assessments turned into tasks per transaction
+FIRE_BATCH_SIZE = 500
+
+# Stale heap entries tolerated beyond 2x the live ones before a rebuild
+COMPACT_SLACK = 1024
+
+# Delay before retrying due entries after a database error
+RETRY_DELAY_SECONDS = 60.0
+
+
+def _utcnow() -> datetime:
+    """Naive UTC, matching stored timestamps"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _follow_up_exists():
+    """Correlated EXISTS: the assessment's follow-up task is already there"""
+    return exists().where(and_(
+        Task.assessment_id == Assessment.id,
+        Task.reassessment_date == Assessment.next_assessment_date,
+    ))
+
+
+class ReassessmentScheduler:
+    """Min-heap of (due_at, assessment_id) with lazy invalidation"""
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.tasks_created = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._due)
+
+    def schedule(self, assessment_id: int, due_at: Optional[datetime]) -> None:
+        """Track (or move) an assessment's reassessment date; None removes it"""
+        if self._task is None:
+            return  # not running in this process
+        if due_at is None:
+            self.unschedule(assessment_id)
+            return
+        due_at = _naive_utc(due_at)
+        if self._due.get(assessment_id) == due_at:
+            return
+        self._due[assessment_id] = due_at
+        heapq.heappush(self._heap, (due_at, assessment_id))
+        if len(self._heap) > 2 * len(self._due) + COMPACT_SLACK:
+            self._compact()
+        if self._heap[0] == (due_at, assessment_id):
+            # New earliest date: let the loop recompute its sleep
+            self._wakeup.set()
+
+    def _compact(self) -> None:
+        """Drop stale entries left behind by reschedules"""
+        self._heap = [(due_at, assessment_id) for assessment_id, due_at in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def unschedule(self, assessment_id: int) -> None:
+        # The heap entry is dropped lazily when it reaches the top
+        self._due.pop(assessment_id, None)
+
+    async def load(self) -> int:
+        """Fill the heap with every dated assessment lacking its follow-up"""
+        query = select(Assessment.id, Assessment.next_assessment_date).where(
+            Assessment.next_assessment_date.isnot(None),
+            ~_follow_up_exists(),
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(query)
+            rows = result.all()
+
+        self._due = {assessment_id: due_at for assessment_id, due_at in rows}
+        self._heap = [(due_at, assessment_id) for assessment_id, due_at in rows]
+        heapq.heapify(self._heap)
+        logger.info(f"Reassessment scheduler loaded {len(self._heap)} upcoming reassessments")
+        return len(self._heap)
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        """Remove and return live entries due at or before now"""
+        due_ids = []
+        while self._heap and self._heap[0][0] <= now and len(due_ids) < FIRE_BATCH_SIZE:
+            due_at, assessment_id = heapq.heappop(self._heap)
+            if self._due.get(assessment_id) != due_at:
+                continue  # rescheduled or removed since this entry was pushed
+            del self._due[assessment_id]
+            due_ids.append(assessment_id)
+        return due_ids
+
+    async def _create_follow_ups(self, assessment_ids: List[int]) -> int:
+        """
+        Create follow-up tasks for assessments whose date is still due and
+        still without one, re-reading them so late edits are respected
+        """
+        now = _utcnow()
+        due_date = now + timedelta(days=settings.reassessment_task_due_days)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Assessment).where(
+                    Assessment.id.in_(assessment_ids),
+                    Assessment.next_assessment_date <= now,
+                    ~_follow_up_exists(),
+                )
+            )
+            assessments = result.scalars().all()
+            for assessment in assessments:
+                db.add(Task(
+                    task_description=f"Reassessment due for assessment #{assessment.id}",
+                    due_date=due_date,
+                    priority=assessment.risk_level or "MEDIUM",
+                    company_id=assessment.company_id,
+                    assessment_id=assessment.id,
+                    reassessment_date=assessment.next_assessment_date,
+                ))
+            await db.commit()
+        return len(assessments)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = _utcnow()
+            due_ids = self._pop_due(now)
+            if due_ids:
+                try:
+                    created = await self._create_follow_ups(due_ids)
+                    self.tasks_created += created
+                    logger.info(f"Reassessment scheduler created {created} follow-up tasks")
+                except Exception as e:
+                    logger.error(f"Failed to create reassessment tasks: {e}")
+                    retry_at = now + timedelta(seconds=RETRY_DELAY_SECONDS)
+                    for assessment_id in due_ids:
+                        # Unless a write rescheduled it meanwhile
+                        if assessment_id not in self._due:
+                            self._due[assessment_id] = retry_at
+                            heapq.heappush(self._heap, (retry_at, assessment_id))
+                continue
+
+            timeout = None
+            if self._heap:
+                timeout = max((self._heap[0][0] - now).total_seconds(), 0.0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        await self.load()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global reassessment scheduler instance
+reassessment_scheduler = ReassessmentScheduler()
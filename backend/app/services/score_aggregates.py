@@ -0,0 +1,373 @@
+"""
+Incrementally maintained per-vendor score totals.
+
+Each scored assessment contributes to its vendor's VendorScoreAggregate row:
+
+    score_sum, score_count            -> flat mean  = score_sum / score_count
+    weighted_score_sum, weight_sum    -> weighted   = weighted_score_sum / weight_sum
+
+The weighted terms use the scoring engine's type weights, but decay is
+anchored at SCORE_DECAY_EPOCH instead of "now": an assessment dated t carries
+weight type_weight * 2 ** ((t - epoch) / half_life). Moving the as-of time
+scales every term of a vendor by the same factor, which cancels in the ratio,
+so the stored sums give the time-decayed score at any moment without being
+rewritten as assessments age. Changing the scoring_* settings changes every
+stored term; run ``python -m app.cli repair-score-aggregates`` afterwards.
+
+As in the engine, assessments are never newer than "now": an undated one,
+or one dated after it was written, counts as dated at its write time
+(created_at). The engine keeps such assessments current for as long as
+their date is unknown or ahead; here they age from their write time.
+
+Anchored weights grow with time, the faster the shorter the half-life. They
+are capped at 2 ** MAX_ANCHOR_EXPONENT; once assessments written now would
+need more, weighted_totals_usable() turns false and weighted scores come
+from the scoring engine instead of the stored totals.
+
+Writers record deltas with record_score_change() inside their own
+transaction, so the totals (and the VendorScoreHistory snapshot taken from
+them) commit or roll back with the assessment itself. A vendor without a
+row yet (nothing has backfilled it) gets one seeded from its assessments
+before the first delta; ``python -m app.cli check-score-aggregates``
+compares the stored rows with their assessments.
+"""
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import (ThirdPartyRiskAssessment, VendorScoreAggregate,
+                      VendorScoreHistory)
+from .scoring_engine import (SECONDS_PER_DAY, ScoringWeights,
+                             load_assessment_arrays, score_portfolio)
+
+logger = logging.getLogger(__name__)
+
+Assessment = ThirdPartyRiskAssessment
+
+# Reference point for decay-anchored weights
+SCORE_DECAY_EPOCH = datetime(2020, 1, 1)
+
+# Anchored weights stay below 2 ** MAX_ANCHOR_EXPONENT, which leaves a float
+# ample headroom to sum millions of them
+MAX_ANCHOR_EXPONENT = 512.0
+
+# Rows per round trip when the repair command reads and rewrites totals
+REPAIR_BATCH_SIZE = 5000
+
+_UPSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+@dataclass(frozen=True)
+class ScoreContribution:
+    """What one assessment adds to its vendor's totals"""
+    company_id: int
+    score: float
+    weighted_score: float
+    weight: float
+
+
+def _naive_utc(value: Optional[datetime]) -> datetime:
+    value = value or datetime.now(timezone.utc)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _anchor_exponent(moment: datetime, half_life_days: float) -> float:
+    days = (moment - SCORE_DECAY_EPOCH).total_seconds() / SECONDS_PER_DAY
+    return days / half_life_days
+
+
+def _anchored_weight(
+    assessment_type: Optional[str],
+    date_assessed: Optional[datetime],
+    written_at: Optional[datetime],
+    weights: ScoringWeights,
+) -> float:
+    weight = weights.type_weights.get(assessment_type, weights.unknown_type_weight)
+    if weights.half_life_days <= 0:
+        return weight
+    # Not yet flushed (created_at unset) means written now
+    written_at = _naive_utc(written_at)
+    assessed = written_at if date_assessed is None else min(_naive_utc(date_assessed), written_at)
+    exponent = _anchor_exponent(assessed, weights.half_life_days)
+    return weight * 2.0 ** min(exponent, MAX_ANCHOR_EXPONENT)
+
+
+def weighted_totals_usable(weights: Optional[ScoringWeights] = None) -> bool:
+    """Whether the stored weighted totals can represent assessments written now"""
+    weights = weights or ScoringWeights.from_settings()
+    if weights.half_life_days <= 0:
+        return True
+    return _anchor_exponent(_naive_utc(None), weights.half_life_days) < MAX_ANCHOR_EXPONENT
+
+
+def contribution(assessment: Assessment, weights: Optional[ScoringWeights] = None) -> Optional[ScoreContribution]:
+    """The assessment's current contribution, or None if it is unscored"""
+    if assessment.risk_score is None:
+        return None
+    weights = weights or ScoringWeights.from_settings()
+    weight = _anchored_weight(assessment.assessment_type, assessment.date_assessed, assessment.created_at, weights)
+    return ScoreContribution(
+        company_id=assessment.company_id,
+        score=assessment.risk_score,
+        weighted_score=weight * assessment.risk_score,
+        weight=weight,
+    )
+
+
+async def _apply(db: AsyncSession, change: ScoreContribution, sign: int):
+    """
+    Add (sign=1) or remove (sign=-1) a contribution with one atomic upsert
+
+    Returns:
+        The vendor's resulting totals row
+    """
+    values = {
+        "company_id": change.company_id,
+        "score_sum": sign * change.score,
+        "score_count": sign,
+        "weighted_score_sum": sign * change.weighted_score,
+        "weight_sum": sign * change.weight,
+    }
+    table = VendorScoreAggregate.__table__
+    stmt = _UPSERTS[db.bind.dialect.name](table).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.company_id],
+        set_={
+            "score_sum": table.c.score_sum + stmt.excluded.score_sum,
+            "score_count": table.c.score_count + stmt.excluded.score_count,
+            "weighted_score_sum": table.c.weighted_score_sum + stmt.excluded.weighted_score_sum,
+            "weight_sum": table.c.weight_sum + stmt.excluded.weight_sum,
+            "updated_at": datetime.now(timezone.utc),
+        },
+    ).returning(
+        table.c.company_id,
+        table.c.score_sum,
+        table.c.score_count,
+        table.c.weighted_score_sum,
+        table.c.weight_sum,
+    )
+    result = await db.execute(stmt)
+    return result.one()
+
+
+async def _seed_missing_totals(db: AsyncSession, company_ids: Set[int]) -> None:
+    """
+    Create the totals rows that do not exist yet from the vendors' current
+    assessments, so the delta that follows lands on complete totals
+
+    Vendors have no row on databases nothing has backfilled (SQLite set up
+    by init_db, or PostgreSQL before repair-score-aggregates) until their
+    first write. Autoflush stays off so the rows are computed from the
+    assessments as committed, without the caller's pending change, which
+    the delta then applies.
+    """
+    with db.no_autoflush:
+        result = await db.execute(
+            select(VendorScoreAggregate.company_id).where(VendorScoreAggregate.company_id.in_(company_ids))
+        )
+        missing = company_ids - set(result.scalars())
+        if not missing:
+            return
+        _, rows = await _compute_totals(db, sorted(missing))
+        seeded = {row["company_id"] for row in rows}
+        rows += [
+            {"company_id": company_id, "score_sum": 0.0, "score_count": 0, "weighted_score_sum": 0.0, "weight_sum": 0.0}
+            for company_id in sorted(missing - seeded)
+        ]
+        table = VendorScoreAggregate.__table__
+        # A concurrent writer may have seeded the same vendor; its row wins
+        # and the delta applies to that instead
+        stmt = _UPSERTS[db.bind.dialect.name](table).values(
+            [{**row, "updated_at": datetime.now(timezone.utc)} for row in rows]
+        ).on_conflict_do_nothing(index_elements=[table.c.company_id])
+        await db.execute(stmt)
+
+
+async def record_score_change(
+    db: AsyncSession,
+    before: Optional[ScoreContribution],
+    after: Optional[ScoreContribution],
+) -> None:
+    """
+    Move a vendor's totals from an assessment's old contribution to its new
+    one and snapshot the resulting scores into the vendor's history. Pass
+    None for "did not exist / was unscored". Does not commit.
+    """
+    if before == after:
+        return
+    await _seed_missing_totals(db, {change.company_id for change in (before, after) if change is not None})
+    totals = {}
+    if before is not None:
+        row = await _apply(db, before, -1)
+        totals[row.company_id] = row
+    if after is not None:
+        row = await _apply(db, after, 1)
+        totals[row.company_id] = row
+
+    engine_scores = None
+    if not weighted_totals_usable():
+        # Streamed queries do not autoflush the pending assessment change
+        await db.flush()
+        arrays = await load_assessment_arrays(db, company_ids=list(totals))
+        engine_scores = score_portfolio(arrays).as_dict()
+
+    recorded_at = datetime.now(timezone.utc)
+    for row in totals.values():
+        scored = row.score_count > 0
+        if engine_scores is not None:
+            weighted = engine_scores.get(row.company_id)
+        else:
+            weighted = row.weighted_score_sum / row.weight_sum if scored and row.weight_sum > 0 else None
+        db.add(VendorScoreHistory(
+            company_id=row.company_id,
+            recorded_at=recorded_at,
+            risk_score=row.score_sum / row.score_count if scored else None,
+            weighted_risk_score=weighted if scored else None,
+            assessment_count=max(row.score_count, 0),
+        ))
+
+
+async def get_score_aggregate(company_id: int, db: AsyncSession) -> Optional[VendorScoreAggregate]:
+    """Primary-key lookup of a vendor's totals"""
+    return await db.get(VendorScoreAggregate, company_id)
+
+
+async def _compute_totals(db: AsyncSession, company_ids: Optional[List[int]] = None) -> Tuple[int, List[Dict]]:
+    """
+    Totals rows computed from the assessment table, for every vendor or just
+    company_ids; vendors without scored assessments get no row
+
+    Returns:
+        (assessments read, rows)
+    """
+    weights = ScoringWeights.from_settings()
+    query = (
+        select(
+            Assessment.company_id,
+            Assessment.risk_score,
+            Assessment.assessment_type,
+            Assessment.date_assessed,
+            Assessment.created_at,
+        )
+        .where(Assessment.risk_score.isnot(None))
+        .execution_options(yield_per=REPAIR_BATCH_SIZE)
+    )
+    if company_ids is not None:
+        query = query.where(Assessment.company_id.in_(company_ids))
+
+    ids_read: List[np.ndarray] = []
+    scores: List[np.ndarray] = []
+    anchored: List[np.ndarray] = []
+    epoch = np.datetime64(SCORE_DECAY_EPOCH, "us")
+    now = np.datetime64(_naive_utc(None), "us")
+    result = await db.stream(query)
+    async for partition in result.partitions():
+        ids, risk_scores, types, dates, created = zip(*partition)
+        type_weights = np.array(
+            [weights.type_weights.get(t, weights.unknown_type_weight) for t in types], dtype=np.float64
+        )
+        if weights.half_life_days > 0:
+            # Same rules as _anchored_weight, one partition at a time
+            written = np.array(created, dtype="datetime64[us]")
+            written = np.where(np.isnat(written), now, written)
+            assessed = np.array(dates, dtype="datetime64[us]")
+            assessed = np.minimum(np.where(np.isnat(assessed), written, assessed), written)
+            exponent = (assessed - epoch) / np.timedelta64(1, "D") / weights.half_life_days
+            type_weights = type_weights * np.exp2(np.minimum(exponent, MAX_ANCHOR_EXPONENT))
+        ids_read.append(np.array(ids, dtype=np.int64))
+        scores.append(np.array(risk_scores, dtype=np.float64))
+        anchored.append(type_weights)
+
+    if not ids_read:
+        return 0, []
+    company_id = np.concatenate(ids_read)
+    score = np.concatenate(scores)
+    weight = np.concatenate(anchored)
+
+    vendors, inverse = np.unique(company_id, return_inverse=True)
+    score_sum = np.bincount(inverse, weights=score, minlength=len(vendors))
+    score_count = np.bincount(inverse, minlength=len(vendors))
+    weighted_score_sum = np.bincount(inverse, weights=weight * score, minlength=len(vendors))
+    weight_sum = np.bincount(inverse, weights=weight, minlength=len(vendors))
+    rows = [
+        {
+            "company_id": int(vendors[i]),
+            "score_sum": float(score_sum[i]),
+            "score_count": int(score_count[i]),
+            "weighted_score_sum": float(weighted_score_sum[i]),
+            "weight_sum": float(weight_sum[i]),
+        }
+        for i in range(len(vendors))
+    ]
+    return len(company_id), rows
+
+
+async def repair_score_aggregates(db: AsyncSession) -> Tuple[int, int]:
+    """
+    Recompute every vendor's totals from the assessment table and replace
+    the stored rows in one transaction
+
+    Run it after changing the scoring_* settings or if the totals are
+    suspected to have drifted. Assessment writes made while it runs may be
+    overwritten, so run it in a quiet period.
+
+    Returns:
+        (assessments read, vendors written)
+    """
+    assessments_read, rows = await _compute_totals(db)
+
+    await db.execute(delete(VendorScoreAggregate))
+    for start in range(0, len(rows), REPAIR_BATCH_SIZE):
+        await db.execute(insert(VendorScoreAggregate), rows[start:start + REPAIR_BATCH_SIZE])
+    await db.commit()
+
+    logger.info(f"Rebuilt score aggregates for {len(rows)} vendors from {assessments_read} assessments")
+    return assessments_read, len(rows)
+
+
+@dataclass
+class ScoreAggregateMismatch:
+    """A stored totals row that disagrees with its vendor's assessments"""
+    company_id: int
+    stored: Tuple[float, int, float, float]
+    expected: Tuple[float, int, float, float]
+
+
+async def check_score_aggregates(db: AsyncSession, rel_tol: float = 1e-9) -> List[ScoreAggregateMismatch]:
+    """
+    Compare every stored totals row with totals recomputed from the
+    assessment table
+
+    Vendors without a row are not mismatches; their first write seeds it.
+
+    Returns:
+        The rows that differ, empty when the totals are consistent
+    """
+    _, rows = await _compute_totals(db)
+    expected = {
+        row["company_id"]: (row["score_sum"], row["score_count"], row["weighted_score_sum"], row["weight_sum"])
+        for row in rows
+    }
+    mismatches = []
+    result = await db.execute(select(VendorScoreAggregate).order_by(VendorScoreAggregate.company_id))
+    for aggregate in result.scalars():
+        stored = (aggregate.score_sum, aggregate.score_count, aggregate.weighted_score_sum, aggregate.weight_sum)
+        want = expected.get(aggregate.company_id, (0.0, 0, 0.0, 0.0))
+        if stored[1] != want[1] or not all(
+            math.isclose(stored[i], want[i], rel_tol=rel_tol, abs_tol=1e-9) for i in (0, 2, 3)
+        ):
+            mismatches.append(ScoreAggregateMismatch(aggregate.company_id, stored, want))
+    return mismatches
@@ -0,0 +1,84 @@
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from ..config import settings
+from .ttl_cache import CountingTTLCache
+
+_MISSING = object()
+
+# (flat score, weighted score), or None for a vendor with no scored assessments
+CachedScores = Optional[Tuple[float, Optional[float]]]
+
+
+class VendorScoreCache:
+    """
+    Bounded, TTL-expiring cache of per-vendor (flat, weighted) risk scores
+
+    Entries are keyed on company_id and also remember "no scored assessments"
+    (None), since dashboards poll unscored vendors as often as scored ones.
+    Writers call invalidate() after their commit. A lookup that started
+    before an invalidation does not store its (possibly stale) result, so a
+    slow read cannot resurrect an old score after a write.
+
+    The cache is per process; the TTL bounds how long other workers can
+    serve a score after a write they did not see.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = CountingTTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_compute(
+        self,
+        company_id: int,
+        compute: Callable[[], Awaitable[CachedScores]],
+    ) -> CachedScores:
+        """Return the cached score, computing and storing it on a miss"""
+        with self._lock:
+            try:
+                score = self._cache[company_id]
+            except KeyError:
+                self.misses += 1
+                generation = self._generation
+            else:
+                self.hits += 1
+                return score
+
+        score = await compute()
+        with self._lock:
+            if generation == self._generation:
+                self._cache[company_id] = score
+        return score
+
+    def invalidate(self, company_ids: Iterable[Optional[int]]) -> None:
+        """Drop the entries for the given vendors"""
+        with self._lock:
+            self._generation += 1
+            for company_id in set(company_ids):
+                if company_id is not None and self._cache.pop(company_id, _MISSING) is not _MISSING:
+                    self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self._cache.currsize,
+                "maxsize": self._cache.maxsize,
+                "ttl_seconds": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self._cache.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Global score cache instance
+vendor_score_cache = VendorScoreCache(
+    maxsize=settings.score_cache_maxsize,
+    ttl=settings.score_cache_ttl_seconds,
+)
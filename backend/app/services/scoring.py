@@ -1,12 +1,191 @@
-from sqlalchemy.orm import Session
-from ..models import ThirdPartyRiskAssessment
-
-def calculate_vendor_risk_score(company_id: int, db: Session):
-    assessments = db.query(ThirdPartyRiskAssessment).filter(
-        ThirdPartyRiskAssessment.company_id == company_id
-    ).all()
-    if not assessments:
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Company, ThirdPartyRiskAssessment, VendorScoreHistory
+from .score_aggregates import get_score_aggregate, weighted_totals_usable
+from .scoring_engine import (ScoringWeights, load_assessment_arrays,
+                             score_portfolio)
+
+Assessment = ThirdPartyRiskAssessment
+
+SCORE_HISTORY_BUCKET_PATTERN = "^(day|week|month)$"
+
+# SQLite datetime() modifiers truncating a timestamp to the start of a
+# bucket; weeks start on Monday, as with PostgreSQL date_trunc('week')
+_SQLITE_BUCKET_MODIFIERS = {
+    "day": ("start of day",),
+    "week": ("weekday 0", "-6 days", "start of day"),
+    "month": ("start of month",),
+}
+
+
+def vendor_scores_query(
+    company_ids: Optional[List[int]] = None,
+    risk_tier: Optional[str] = None,
+    status: Optional[str] = None,
+    industry: Optional[str] = None,
+) -> Select:
+    """
+    Build a single GROUP BY company_id statement scoring many vendors
+
+    AVG and COUNT ignore NULL risk scores, so unscored assessments neither
+    skew the mean nor count towards it.
+    """
+    query = (
+        select(
+            Assessment.company_id,
+            func.avg(Assessment.risk_score).label("risk_score"),
+            func.count(Assessment.risk_score).label("assessment_count"),
+        )
+        .where(Assessment.risk_score.isnot(None))
+        .group_by(Assessment.company_id)
+    )
+    if company_ids:
+        query = query.where(Assessment.company_id.in_(company_ids))
+    if risk_tier or status or industry:
+        query = query.join(Company, Company.id == Assessment.company_id)
+        if risk_tier:
+            query = query.where(Company.risk_tier == risk_tier)
+        if status:
+            query = query.where(Company.status == status)
+        if industry:
+            query = query.where(Company.industry == industry)
+    return query
+
+
+async def calculate_vendor_risk_score(company_id: int, db: AsyncSession) -> Optional[Tuple[float, Optional[float]]]:
+    """
+    Flat and weighted risk score of a vendor, or None if it has no scored
+    assessments
+
+    Reads the vendor's running totals by primary key. Vendors without a
+    totals row (e.g. before the first repair-score-aggregates run) are
+    scored from their assessments instead, as is the weighted score once
+    the stored weighted totals are no longer usable.
+    """
+    aggregate = await get_score_aggregate(company_id, db)
+    if aggregate is not None:
+        if aggregate.score_count <= 0:
+            return None
+        if not weighted_totals_usable():
+            weighted = score_portfolio(await load_assessment_arrays(db, company_ids=[company_id]))
+            return aggregate.score_sum / aggregate.score_count, float(weighted.risk_score[0]) if len(weighted) else None
+        weighted = None
+        if aggregate.weight_sum > 0:
+            weighted = aggregate.weighted_score_sum / aggregate.weight_sum
+        return aggregate.score_sum / aggregate.score_count, weighted
+
+    result = await db.execute(
+        select(
+            func.avg(Assessment.risk_score),
+            func.count(Assessment.risk_score),
+        ).where(Assessment.company_id == company_id)
+    )
+    avg_score, scored_count = result.one()
+    if not scored_count:
         return None
-    total_score = sum([assessment.risk_score for assessment in assessments])
-    avg_score = total_score / len(assessments)
-    return avg_score
+    weighted = score_portfolio(await load_assessment_arrays(db, company_ids=[company_id]))
+    return float(avg_score), float(weighted.risk_score[0]) if len(weighted) else None
+
+
+async def calculate_vendor_risk_scores(
+    db: AsyncSession,
+    after_company_id: Optional[int] = None,
+    limit: int = 1000,
+    **filters,
+) -> List[Tuple[int, float, int]]:
+    """
+    Score a page of vendors, ordered by company_id, in one statement
+
+    Returns:
+        (company_id, risk_score, assessment_count) rows
+    """
+    query = vendor_scores_query(**filters)
+    if after_company_id is not None:
+        query = query.where(Assessment.company_id > after_company_id)
+    query = query.order_by(Assessment.company_id).limit(limit)
+    result = await db.execute(query)
+    return [(row.company_id, float(row.risk_score), row.assessment_count) for row in result]
+
+
+async def calculate_weighted_vendor_scores(
+    db: AsyncSession,
+    after_company_id: Optional[int] = None,
+    limit: int = 1000,
+    **filters,
+) -> List[Tuple[int, float, int]]:
+    """
+    Score a page of vendors with the weighted, time-decayed engine
+
+    The page of company ids is chosen by the same filtered GROUP BY as the
+    flat scores, then their assessments are loaded as arrays and scored in
+    one vectorized pass.
+    """
+    query = vendor_scores_query(**filters).with_only_columns(Assessment.company_id)
+    if after_company_id is not None:
+        query = query.where(Assessment.company_id > after_company_id)
+    query = query.order_by(Assessment.company_id).limit(limit)
+    company_ids = list((await db.execute(query)).scalars())
+    if not company_ids:
+        return []
+
+    arrays = await load_assessment_arrays(db, company_ids=company_ids)
+    scores = score_portfolio(arrays, ScoringWeights.from_settings())
+    return list(zip(
+        scores.company_id.tolist(),
+        scores.risk_score.tolist(),
+        scores.assessment_count.tolist(),
+    ))
+
+
+def score_history_bucket(column, bucket: str, dialect_name: str):
+    """SQL expression truncating a timestamp column to its day/week/month"""
+    if dialect_name == "postgresql":
+        return func.date_trunc(bucket, column)
+    return func.datetime(column, *_SQLITE_BUCKET_MODIFIERS[bucket])
+
+
+async def get_vendor_score_history(
+    company_id: int,
+    db: AsyncSession,
+    bucket: str = "month",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Downsample a vendor's score snapshots to one point per bucket
+
+    Each point carries the mean, min and max of the snapshots recorded in
+    the bucket, so a multi-year monthly chart is a few dozen rows.
+    """
+    History = VendorScoreHistory
+    bucket_start = score_history_bucket(History.recorded_at, bucket, db.bind.dialect.name).label("bucket_start")
+    query = (
+        select(
+            bucket_start,
+            func.avg(History.risk_score).label("risk_score"),
+            func.min(History.risk_score).label("min_risk_score"),
+            func.max(History.risk_score).label("max_risk_score"),
+            func.avg(History.weighted_risk_score).label("weighted_risk_score"),
+            func.count(History.id).label("samples"),
+        )
+        .where(History.company_id == company_id)
+        .group_by(bucket_start)
+        .order_by(bucket_start)
+    )
+    if date_from is not None:
+        query = query.where(History.recorded_at >= date_from)
+    if date_to is not None:
+        query = query.where(History.recorded_at < date_to)
+
+    result = await db.execute(query)
+    points = []
+    for row in result:
+        point = dict(row._mapping)
+        if isinstance(point["bucket_start"], str):
+            # SQLite returns datetime() results as text
+            point["bucket_start"] = datetime.fromisoformat(point["bucket_start"])
+        points.append(point)
+    return points
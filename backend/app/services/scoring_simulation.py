@@ -0,0 +1,145 @@
+"""
+What-if scoring: re-score the portfolio under candidate weights and tier
+thresholds without writing anything.
+
+Assessments and current tiers are read once, inside a single read-only
+snapshot, and both the baseline (current settings) and the candidate model
+are scored in memory with the vectorized engine.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Company
+from .scoring_engine import (RISK_TIERS, ScoringWeights, TierThresholds,
+                             load_assessment_arrays, score_portfolio)
+
+logger = logging.getLogger(__name__)
+
+# Stored tiers outside RISK_TIERS (or NULL) are reported as from_tier=None
+NO_TIER = -1
+_TIER_CODES = {tier: code for code, tier in enumerate(RISK_TIERS)}
+
+
+async def _begin_snapshot(db: AsyncSession) -> None:
+    """Pin every read of this session to one consistent snapshot"""
+    if db.bind.dialect.name == "postgresql":
+        await db.connection(execution_options={
+            "isolation_level": "REPEATABLE READ",
+            "postgresql_readonly": True,
+        })
+
+
+async def _load_current_tiers(db: AsyncSession) -> Tuple[np.ndarray, np.ndarray]:
+    """(company_id, tier code) arrays for every company, ordered by id"""
+    result = await db.execute(select(Company.id, Company.risk_tier).order_by(Company.id))
+    rows = result.all()
+    company_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    tiers = np.array([_TIER_CODES.get(row[1], NO_TIER) for row in rows], dtype=np.int8)
+    return company_ids, tiers
+
+
+def _lookup(keys: np.ndarray, values: np.ndarray, wanted: np.ndarray, missing) -> np.ndarray:
+    """values[keys == wanted[i]] for each i, or missing; keys must be sorted"""
+    if not len(keys):
+        return np.full(len(wanted), missing, dtype=values.dtype)
+    index = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    found = keys[index] == wanted
+    return np.where(found, values[index], missing)
+
+
+def _tier_name(code: int) -> Optional[str]:
+    return RISK_TIERS[code] if code != NO_TIER else None
+
+
+async def simulate_scoring(
+    db: AsyncSession,
+    weights: ScoringWeights,
+    thresholds: TierThresholds,
+    top_n: int = 20,
+) -> Dict[str, Any]:
+    """
+    Score every vendor under the candidate model and compare with the
+    stored risk_tier and with the score under the current settings
+
+    Returns:
+        Tier migration counts (stored tier -> simulated tier) and the
+        top_n vendors whose score moves furthest from the current model
+    """
+    started = time.perf_counter()
+    await _begin_snapshot(db)
+    arrays = await load_assessment_arrays(db)
+    tier_company_ids, current_tiers = await _load_current_tiers(db)
+    loaded = time.perf_counter()
+
+    simulated = score_portfolio(arrays, weights)
+    baseline = score_portfolio(arrays, ScoringWeights.from_settings())
+
+    simulated_tiers = thresholds.assign(simulated.risk_score)
+    stored_tiers = _lookup(tier_company_ids, current_tiers, simulated.company_id, NO_TIER)
+    baseline_scores = _lookup(baseline.company_id, baseline.risk_score, simulated.company_id, np.nan)
+
+    # Tier migrations, counted over (stored, simulated) pairs
+    changed = stored_tiers != simulated_tiers
+    migrations = []
+    if changed.any():
+        pairs, counts = np.unique(
+            np.stack([stored_tiers[changed], simulated_tiers[changed]], axis=1), axis=0, return_counts=True
+        )
+        migrations = [
+            {"from_tier": _tier_name(from_code), "to_tier": RISK_TIERS[to_code], "count": count}
+            for (from_code, to_code), count in zip(pairs.tolist(), counts.tolist())
+        ]
+        migrations.sort(key=lambda migration: migration["count"], reverse=True)
+
+    # Largest absolute score change against the current model
+    deltas = simulated.risk_score - baseline_scores
+    magnitude = np.nan_to_num(np.abs(deltas), nan=-1.0)
+    top_n = min(top_n, len(magnitude))
+    top: List[int] = []
+    if top_n:
+        candidates = np.argpartition(-magnitude, top_n - 1)[:top_n]
+        top = candidates[np.argsort(-magnitude[candidates], kind="stable")].tolist()
+
+    names: Dict[int, str] = {}
+    if top:
+        top_ids = simulated.company_id[top].tolist()
+        result = await db.execute(select(Company.id, Company.name).where(Company.id.in_(top_ids)))
+        names = dict(result.all())
+
+    top_movers = []
+    for i in top:
+        company_id = int(simulated.company_id[i])
+        delta = float(deltas[i])
+        top_movers.append({
+            "company_id": company_id,
+            "name": names.get(company_id),
+            "current_tier": _tier_name(int(stored_tiers[i])),
+            "simulated_tier": RISK_TIERS[int(simulated_tiers[i])],
+            "baseline_score": None if np.isnan(baseline_scores[i]) else float(baseline_scores[i]),
+            "simulated_score": float(simulated.risk_score[i]),
+            "delta": None if np.isnan(delta) else delta,
+        })
+
+    finished = time.perf_counter()
+    logger.info(
+        f"Simulated scoring for {len(simulated)} vendors from {len(arrays)} assessments "
+        f"(load {loaded - started:.2f}s, score {finished - loaded:.2f}s)"
+    )
+    return {
+        "vendors_scored": len(simulated),
+        "vendors_changing_tier": int(changed.sum()),
+        "migrations": migrations,
+        "top_movers": top_movers,
+        "weights": {name.lower(): weight for name, weight in weights.type_weights.items()},
+        "half_life_days": weights.half_life_days,
+        "thresholds": {
+            "medium": thresholds.medium,
+            "high": thresholds.high,
+            "critical": thresholds.critical,
+        },
+    }
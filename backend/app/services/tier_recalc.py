@@ -0,0 +1,203 @@
+"""
+Bulk risk-tier recalculation.
+
+Splits the company id space into contiguous ranges and scores each range in a
+ProcessPoolExecutor worker with the vectorized engine. Workers only read:
+each opens its own database connection, scores its vendors and returns the
+ids whose tier should change, grouped by new tier. The parent then writes
+all changes in one transaction with one ``UPDATE ... WHERE id IN (...)`` per
+tier and chunk, so a nightly run over hundreds of thousands of vendors is a
+handful of statements rather than one per vendor.
+
+Vendors without scored assessments keep their current tier.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.pool import NullPool
+
+from ..config import settings
+from ..database import engine
+from ..models import Company, ThirdPartyRiskAssessment
+from .scoring_engine import (LOAD_BATCH_SIZE, RISK_TIERS, AssessmentArrays,
+                             ScoringWeights, TierThresholds, build_arrays,
+                             score_portfolio)
+
+logger = logging.getLogger(__name__)
+
+Assessment = ThirdPartyRiskAssessment
+
+# Ranges per worker; more, smaller ranges even out skew in the id space
+PARTITIONS_PER_WORKER = 4
+
+# Ids per UPDATE statement when writing tier changes back
+UPDATE_CHUNK_SIZE = 5000
+
+# Serialises runs within a process (CLI and admin endpoint share it)
+_recalc_lock = threading.Lock()
+
+_worker_engine = None
+
+
+class RecalculationInProgress(RuntimeError):
+    """Raised when a recalculation is already running in this process"""
+
+
+@dataclass
+class TierRecalcResult:
+    vendors_scored: int = 0
+    vendors_changed: int = 0
+    changes_by_tier: Dict[str, int] = field(default_factory=dict)
+    partitions: int = 0
+    workers: int = 0
+    dry_run: bool = False
+    elapsed_seconds: float = 0.0
+
+
+def _get_worker_engine():
+    """One NullPool engine per worker process, created on first use"""
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = create_engine(settings.database_url, poolclass=NullPool)
+    return _worker_engine
+
+
+def score_partition(
+    first_id: int,
+    last_id: int,
+    weights: ScoringWeights,
+    thresholds: TierThresholds,
+    as_of: datetime,
+) -> Tuple[int, Dict[str, List[int]]]:
+    """
+    Worker entry point: score companies first_id..last_id (inclusive)
+
+    Returns:
+        (vendors scored, {new tier: [company ids whose stored tier differs]})
+    """
+    worker_engine = _get_worker_engine()
+    in_range = Assessment.company_id.between(first_id, last_id)
+    query = (
+        select(
+            Assessment.company_id,
+            Assessment.risk_score,
+            Assessment.assessment_type,
+            Assessment.date_assessed,
+        )
+        .where(in_range, Assessment.risk_score.isnot(None))
+        .execution_options(yield_per=LOAD_BATCH_SIZE)
+    )
+    with worker_engine.connect() as conn:
+        chunks = [build_arrays(partition, as_of) for partition in conn.execute(query).partitions()]
+        stored = dict(conn.execute(
+            select(Company.id, Company.risk_tier).where(Company.id.between(first_id, last_id))
+        ).all())
+
+    scores = score_portfolio(AssessmentArrays.concatenate(chunks), weights)
+    tiers = thresholds.assign(scores.risk_score)
+
+    changes: Dict[str, List[int]] = {}
+    for company_id, tier_code in zip(scores.company_id.tolist(), tiers.tolist()):
+        tier = RISK_TIERS[tier_code]
+        # A vendor deleted since its assessments were read is absent from stored
+        if company_id in stored and stored[company_id] != tier:
+            changes.setdefault(tier, []).append(company_id)
+    return len(scores), changes
+
+
+def partition_ids(first_id: int, last_id: int, partitions: int) -> List[Tuple[int, int]]:
+    """Split [first_id, last_id] into at most `partitions` contiguous ranges"""
+    bounds = np.linspace(first_id, last_id + 1, num=partitions + 1).astype(np.int64)
+    ranges = []
+    for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        if hi > lo:
+            ranges.append((lo, hi - 1))
+    return ranges
+
+
+def _write_changes(changes: Dict[str, List[int]]) -> None:
+    """Apply tier changes in one transaction, one UPDATE per tier and chunk"""
+    table = Company.__table__
+    with engine.begin() as conn:
+        for tier, company_ids in changes.items():
+            for start in range(0, len(company_ids), UPDATE_CHUNK_SIZE):
+                chunk = company_ids[start:start + UPDATE_CHUNK_SIZE]
+                conn.execute(update(table).where(table.c.id.in_(chunk)).values(risk_tier=tier))
+
+
+def recalculate_risk_tiers(
+    workers: Optional[int] = None,
+    partitions: Optional[int] = None,
+    dry_run: bool = False,
+) -> TierRecalcResult:
+    """
+    Derive every vendor's risk_tier from its assessments and persist changes
+
+    Blocking; call from a thread (run_in_threadpool) inside the API.
+
+    Args:
+        workers: Worker processes (default: CPU count)
+        partitions: Id ranges to split the portfolio into
+            (default: PARTITIONS_PER_WORKER per worker)
+        dry_run: Compute changes without writing them
+
+    Raises:
+        RecalculationInProgress: Another run holds the lock in this process
+    """
+    if not _recalc_lock.acquire(blocking=False):
+        raise RecalculationInProgress("A risk tier recalculation is already running")
+    try:
+        started = time.perf_counter()
+        workers = workers or os.cpu_count() or 1
+        partitions = partitions or workers * PARTITIONS_PER_WORKER
+        result = TierRecalcResult(workers=workers, dry_run=dry_run)
+
+        with engine.connect() as conn:
+            first_id, last_id = conn.execute(select(func.min(Company.id), func.max(Company.id))).one()
+        if first_id is None:
+            return result
+
+        ranges = partition_ids(first_id, last_id, partitions)
+        result.partitions = len(ranges)
+        weights = ScoringWeights.from_settings()
+        thresholds = TierThresholds.from_settings()
+        as_of = datetime.now(timezone.utc)
+
+        changes: Dict[str, List[int]] = {}
+        # spawn: forking a process that runs an event loop and connection
+        # pools is unsafe, and workers open their own connections anyway
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(score_partition, lo, hi, weights, thresholds, as_of)
+                for lo, hi in ranges
+            ]
+            for future in futures:
+                scored, partition_changes = future.result()
+                result.vendors_scored += scored
+                for tier, company_ids in partition_changes.items():
+                    changes.setdefault(tier, []).extend(company_ids)
+
+        result.changes_by_tier = {tier: len(company_ids) for tier, company_ids in changes.items()}
+        result.vendors_changed = sum(result.changes_by_tier.values())
+        if changes and not dry_run:
+            _write_changes(changes)
+
+        result.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            f"Risk tier recalculation scored {result.vendors_scored} vendors in {len(ranges)} partitions "
+            f"on {workers} workers, {result.vendors_changed} tier changes "
+            f"({'dry run' if dry_run else 'written'}) in {result.elapsed_seconds:.1f}s"
+        )
+        return result
+    finally:
+        _recalc_lock.release()
@@ -0,0 +1,230 @@
+"""
+Access token revocation by the token's jti claim.
+
+Revoked jtis are stored in revoked_tokens until the token would have expired
+anyway. Each worker mirrors them into an in-process Bloom filter, so
+get_current_user answers the common case, a token that was never revoked,
+with a few hash probes and no database round trip. Only a filter hit (a
+revoked token or, rarely, a false positive) is confirmed with a primary-key
+lookup.
+
+A background task refreshes the filter incrementally with the rows revoked
+since its previous read, so another worker's revocation takes effect here
+within token_revocation_refresh_seconds; this worker's own revocations are
+added at once. A Bloom filter cannot forget entries, so the task rebuilds it
+from the unexpired rows, purging expired ones, every REBUILD_INTERVAL_SECONDS
+or once it holds more entries than it was sized for.
+
+Until the first load, and whenever refreshes have been failing for longer
+than STALE_AFTER_REFRESHES intervals, every lookup goes to the database.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import AsyncSessionLocal
+from ..models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Each refresh re-reads this far behind the previous one, covering clock
+# skew between workers and transactions that committed late
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+REBUILD_INTERVAL_SECONDS = 3600.0
+
+# Missed refreshes after which the filter is no longer trusted
+STALE_AFTER_REFRESHES = 3
+
+_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings, sized for capacity entries"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> List[int]:
+        # Double hashing: every probe position from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class TokenRevocationList:
+    """Revoked jtis in the database, with a per-process Bloom filter in front"""
+
+    def __init__(self, refresh_interval: float, capacity: int, error_rate: float):
+        self.refresh_interval = refresh_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter: Optional[BloomFilter] = None
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._rebuilt_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.filter_negatives = 0
+        self.database_checks = 0
+        self.false_positives = 0
+        self.refreshes = 0
+        self.rebuilds = 0
+        self.purged = 0
+
+    def _usable_filter(self) -> Optional[BloomFilter]:
+        if self._filter is None:
+            return None
+        if time.monotonic() - self._refreshed_at > self.refresh_interval * STALE_AFTER_REFRESHES:
+            return None
+        return self._filter
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        bloom = self._usable_filter()
+        if bloom is not None and jti not in bloom:
+            self.filter_negatives += 1
+            return False
+        self.database_checks += 1
+        result = await db.execute(select(RevokedToken.jti).where(RevokedToken.jti == jti))
+        revoked = result.first() is not None
+        if bloom is not None and not revoked:
+            self.false_positives += 1
+        return revoked
+
+    async def revoke(self, db: AsyncSession, jti: str, user_id: Optional[int], expires_at: datetime) -> bool:
+        """
+        Record a revocation
+
+        Returns:
+            False if the jti was already revoked
+        """
+        # One statement, so concurrent revocations of a jti (a logout racing
+        # an admin revoke) cannot both insert it
+        stmt = _INSERTS[db.bind.dialect.name](RevokedToken).values(
+            jti=jti,
+            user_id=user_id,
+            expires_at=expires_at,
+            revoked_at=datetime.now(timezone.utc),
+        ).on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        result = await db.execute(stmt)
+        await db.commit()
+        if not result.rowcount:
+            return False
+        if self._filter is not None and jti not in self._filter:
+            self._filter.add(jti)
+        return True
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Purge expired revocations and load the rest into a fresh filter"""
+        started = datetime.now(timezone.utc)
+        purged = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= started))
+        await db.commit()
+        self.purged += purged.rowcount or 0
+        result = await db.execute(select(RevokedToken.jti).where(RevokedToken.expires_at > started))
+        jtis = result.scalars().all()
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        self._filter = bloom
+        self._watermark = started
+        self._refreshed_at = self._rebuilt_at = time.monotonic()
+        self.rebuilds += 1
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Add the revocations made since the previous read"""
+        started = datetime.now(timezone.utc)
+        result = await db.execute(
+            select(RevokedToken.jti).where(RevokedToken.revoked_at >= self._watermark - REFRESH_OVERLAP)
+        )
+        for jti in result.scalars():
+            if jti not in self._filter:
+                self._filter.add(jti)
+        self._watermark = started
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    def _rebuild_due(self) -> bool:
+        return (
+            self._filter is None
+            or self._filter.count > self._filter.capacity
+            or time.monotonic() - self._rebuilt_at >= REBUILD_INTERVAL_SECONDS
+        )
+
+    async def _update(self) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                if self._rebuild_due():
+                    await self.rebuild(db)
+                else:
+                    await self.refresh(db)
+        except Exception as e:
+            logger.error(f"Token revocation refresh failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self._update()
+
+    async def start(self) -> None:
+        """Load the filter, then keep it up to date in the background"""
+        await self._update()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._filter = None
+
+    def stats(self) -> Dict[str, Any]:
+        bloom = self._filter
+        return {
+            "filter_active": self._usable_filter() is not None,
+            "filter_entries": bloom.count if bloom else 0,
+            "filter_capacity": bloom.capacity if bloom else 0,
+            "filter_bytes": len(bloom._bits) if bloom else 0,
+            "filter_negatives": self.filter_negatives,
+            "database_checks": self.database_checks,
+            "false_positives": self.false_positives,
+            "refreshes": self.refreshes,
+            "rebuilds": self.rebuilds,
+            "purged": self.purged,
+        }
+
+
+# Global token revocation list instance
+token_revocation_list = TokenRevocationList(
+    refresh_interval=settings.token_revocation_refresh_seconds,
+    capacity=settings.token_revocation_bloom_capacity,
+    error_rate=settings.token_revocation_bloom_error_rate,
+)
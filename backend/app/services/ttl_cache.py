@@ -0,0 +1,13 @@
+from cachetools import TTLCache
+
+
+class CountingTTLCache(TTLCache):
+    """TTLCache that counts capacity evictions (expiry is not an eviction)"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
@@ -0,0 +1,99 @@
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from ..config import settings
+from ..models import User
+from .ttl_cache import CountingTTLCache
+
+_MISSING = object()
+
+
+class AuthenticatedUserCache:
+    """
+    Bounded, TTL-expiring cache of the users behind token subjects
+
+    Entries are detached User instances keyed on username (the token's
+    ``sub``). Callers must not hand them out directly: get_current_user
+    merges a copy into the request's session, so a route that modifies its
+    user cannot change the cached one.
+
+    users routes call invalidate() after committing a change. The cache is
+    per process and other workers are not told, so the TTL is kept short:
+    it bounds how long another worker keeps serving a changed or deleted
+    user.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.enabled = maxsize > 0 and ttl > 0
+        self._cache = CountingTTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_load(
+        self,
+        username: str,
+        load: Callable[[], Awaitable[Optional[User]]],
+    ) -> Optional[User]:
+        """
+        Return the cached user, loading it on a miss
+
+        load must return a User detached from its session (or None); unknown
+        subjects are not cached.
+        """
+        if not self.enabled:
+            return await load()
+        with self._lock:
+            try:
+                user = self._cache[username]
+            except KeyError:
+                self.misses += 1
+                generation = self._generation
+            else:
+                self.hits += 1
+                return user
+
+        user = await load()
+        with self._lock:
+            if user is not None and generation == self._generation:
+                self._cache[username] = user
+        return user
+
+    def invalidate(self, usernames: Iterable[Optional[str]]) -> None:
+        """Drop the entries for the given usernames"""
+        with self._lock:
+            self._generation += 1
+            for username in set(usernames):
+                if username is not None and self._cache.pop(username, _MISSING) is not _MISSING:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            evictions = self._cache.evictions
+            self._cache.clear()
+            self._cache.evictions = evictions
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": self._cache.currsize,
+                "maxsize": self._cache.maxsize,
+                "ttl_seconds": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self._cache.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Global authenticated user cache instance
+authenticated_user_cache = AuthenticatedUserCache(
+    maxsize=settings.auth_user_cache_maxsize,
+    ttl=settings.auth_user_cache_ttl_seconds,
+)
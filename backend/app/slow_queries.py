@@ -0,0 +1,206 @@
+"""
+Slow-query log with EXPLAIN capture.
+
+SlowQueryLog times every statement on the engines it is installed on. A
+statement slower than SLOW_QUERY_THRESHOLD_MS is logged with its SQL, the
+shape of its bound parameters (types, never values), its duration and the
+route and correlation ID of the request that ran it, and is kept in a ring
+buffer of the most recent SLOW_QUERY_BUFFER_SIZE entries, served by
+GET /admin/slow-queries.
+
+On the async engine the entry's plan is then captured in the background: a
+task runs a plain EXPLAIN (never ANALYZE, so nothing is executed again) on a
+separate connection and attaches the result to the entry. At most one
+EXPLAIN runs at a time and plans are reused per statement for
+PLAN_CACHE_TTL_SECONDS, so a burst of slow queries cannot take over the
+pool. Statements run from worker threads on the sync engine, and any
+statement on the SQLite development setup (whose single shared connection
+an EXPLAIN would interleave with the request's transaction), are recorded
+without a plan.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextvars import Context, ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from cachetools import TTLCache
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import StaticPool
+
+from .config import settings
+from .sql_stats import current_stats, statement_shape
+
+logger = logging.getLogger(__name__)
+
+# Statement text kept per entry
+MAX_STATEMENT_LENGTH = 4000
+
+# Only these are explained; EXPLAIN without ANALYZE does not execute them
+EXPLAINABLE_PREFIXES = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+PLAN_CACHE_SIZE = 256
+PLAN_CACHE_TTL_SECONDS = 300.0
+
+_explaining: ContextVar[bool] = ContextVar("slow_query_explaining", default=False)
+
+
+@dataclass
+class SlowQuery:
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: Any
+    executemany: bool
+    route: Optional[str]
+    correlation_id: Optional[str]
+    plan: Optional[str] = None
+    plan_error: Optional[str] = None
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> Any:
+    """Bound parameters with each value replaced by its type name"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {"rows": len(parameters), "first": parameter_shape(parameters[0], False) if parameters else None}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class SlowQueryLog:
+    """Ring buffer of the most recent slow statements"""
+
+    def __init__(self, threshold_ms: float, size: int, explain: bool):
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self._entries: Deque[SlowQuery] = deque(maxlen=size)
+        self._async_engine: Optional[AsyncEngine] = None
+        self._explain_slot = asyncio.Semaphore(1)
+        self._plans: TTLCache = TTLCache(maxsize=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL_SECONDS)
+        self._tasks: Set[asyncio.Task] = set()
+        self.recorded = 0
+        self.explains = 0
+        self.explains_skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def install(self, engine: Engine, async_engine: Optional[AsyncEngine] = None) -> None:
+        """Time statements on engine; pass async_engine (whose sync_engine is engine) to capture plans"""
+        if not self.enabled:
+            return
+        if async_engine is not None:
+            self._async_engine = async_engine
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None or _explaining.get():
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < self.threshold:
+            return
+
+        request = current_stats()
+        entry = SlowQuery(
+            recorded_at=datetime.now(timezone.utc),
+            duration_ms=round(elapsed * 1000.0, 3),
+            statement=statement[:MAX_STATEMENT_LENGTH],
+            parameters=parameter_shape(parameters, executemany),
+            executemany=executemany,
+            route=request.route if request else None,
+            correlation_id=request.correlation_id if request else None,
+        )
+        self._entries.append(entry)
+        self.recorded += 1
+        logger.warning(
+            f"Slow query ({entry.duration_ms:.1f} ms) from {entry.route or 'background'} "
+            f"[{entry.correlation_id}]: {statement_shape(entry.statement)[:500]} params={entry.parameters}"
+        )
+        if (
+            self.explain
+            and conn.engine is getattr(self._async_engine, "sync_engine", None)
+            and not isinstance(conn.engine.pool, StaticPool)
+        ):
+            self._schedule_explain(entry, statement, parameters, executemany)
+
+    def _schedule_explain(self, entry: SlowQuery, statement: str, parameters: Any, executemany: bool) -> None:
+        if executemany or not statement.lstrip().upper().startswith(EXPLAINABLE_PREFIXES):
+            return
+        plan = self._plans.get(statement)
+        if plan is not None:
+            entry.plan = plan
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # A fresh context: the EXPLAIN does not belong to the request that
+        # triggered it and must not count towards its SQL stats
+        task = loop.create_task(self._explain(entry, statement, parameters), context=Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        if self._explain_slot.locked():
+            self.explains_skipped += 1
+            entry.plan_error = "Skipped, another EXPLAIN was running"
+            return
+        _explaining.set(True)
+        async with self._explain_slot:
+            engine = self._async_engine
+            prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+            try:
+                async with engine.connect() as conn:
+                    result = await conn.exec_driver_sql(prefix + statement, parameters)
+                    rows = result.all()
+            except Exception as e:
+                entry.plan_error = str(e)
+                logger.warning(f"EXPLAIN of slow query failed: {e}")
+                return
+            # PostgreSQL returns one line per row; SQLite (id, parent, notused, detail)
+            entry.plan = "\n".join(str(row[-1]) for row in rows)
+            self._plans[statement] = entry.plan
+            self.explains += 1
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Recorded slow queries, newest first"""
+        recent = list(reversed(self._entries))
+        if limit is not None:
+            recent = recent[:limit]
+        return [asdict(entry) for entry in recent]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._plans.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold * 1000.0,
+            "buffered": len(self._entries),
+            "buffer_size": self._entries.maxlen,
+            "recorded": self.recorded,
+            "explains": self.explains,
+            "explains_skipped": self.explains_skipped,
+        }
+
+
+# Global slow query log instance
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    size=settings.slow_query_buffer_size,
+    explain=settings.slow_query_explain,
+)
@@ -0,0 +1,122 @@
+"""
+Per-request SQL statement counts and database time.
+
+install_sql_stats() hooks before/after_cursor_execute on the async engine.
+The request logging middleware calls start_request() with the request's
+correlation ID; that puts a RequestSQLStats into a context variable, which
+the tasks and threads serving the request inherit, so every statement they
+run is added to it. Statements run outside a request (background jobs, the
+audit writer, the CLI) are not counted.
+
+The totals go into the request log line and a Server-Timing header
+(``db;dur=12.3;desc="7 queries"``), which browser dev tools display.
+
+With SQL_N_PLUS_ONE_THRESHOLD set, statements are also tallied by shape
+(the SQL text, with IN lists collapsed) and repeated_statements() reports
+the shapes a request ran more than that many times: the usual sign of a
+lazy load or a per-row query inside a loop.
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+
+# Statement text kept per shape in N+1 warnings
+MAX_SHAPE_LENGTH = 300
+
+_IN_LIST_PATTERN = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))+\s*\)")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@dataclass
+class RequestSQLStats:
+    correlation_id: str
+    statements: int = 0
+    seconds: float = 0.0
+    # Statement shape -> executions; only kept when the N+1 check is on
+    shapes: Optional[Counter] = field(default=None, repr=False)
+    # The request's ASGI scope, which gains the matched route once routed
+    scope: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
+    @property
+    def milliseconds(self) -> float:
+        return self.seconds * 1000.0
+
+    @property
+    def route(self) -> Optional[str]:
+        """Method and route template (or raw path, before routing)"""
+        if self.scope is None:
+            return None
+        template = getattr(self.scope.get("route"), "path_format", None)
+        return f"{self.scope.get('method')} {template or self.scope.get('path')}"
+
+
+_current: ContextVar[Optional[RequestSQLStats]] = ContextVar("request_sql_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """SQL text with whitespace normalized and IN lists of any length collapsed"""
+    statement = _WHITESPACE_PATTERN.sub(" ", statement).strip()
+    return _IN_LIST_PATTERN.sub("(...)", statement)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._sql_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_sql_stats_started", None)
+    if stats is None or started is None:
+        return
+    stats.statements += 1
+    stats.seconds += time.perf_counter() - started
+    if stats.shapes is not None:
+        stats.shapes[statement_shape(statement)] += 1
+
+
+def install_sql_stats(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def start_request(correlation_id: str, scope: Optional[Dict[str, Any]] = None) -> Tuple[RequestSQLStats, Token]:
+    """Start counting for the current request; pass the token to finish_request()"""
+    stats = RequestSQLStats(
+        correlation_id=correlation_id,
+        shapes=Counter() if settings.sql_n_plus_one_threshold > 0 else None,
+        scope=scope,
+    )
+    return stats, _current.set(stats)
+
+
+def finish_request(token: Token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[RequestSQLStats]:
+    return _current.get()
+
+
+def server_timing(stats: RequestSQLStats) -> str:
+    return f'db;dur={stats.milliseconds:.1f};desc="{stats.statements} queries"'
+
+
+def repeated_statements(stats: RequestSQLStats) -> List[Tuple[str, int]]:
+    """Statement shapes run more than SQL_N_PLUS_ONE_THRESHOLD times, most repeated first"""
+    if stats.shapes is None:
+        return []
+    threshold = settings.sql_n_plus_one_threshold
+    return [
+        (shape[:MAX_SHAPE_LENGTH], count)
+        for shape, count in stats.shapes.most_common()
+        if count > threshold
+    ]
@@ -0,0 +1,115 @@
+"""
+Benchmark list latency while logins saturate password hashing.
+
+Starts the app in-process against a scratch database, then floods
+POST /api/v1/auth/login while timing GET /api/v1/companies/, whose sync
+dependencies run on FastAPI's shared threadpool. It runs twice: once with
+bcrypt pushed through run_in_threadpool (the previous behaviour) and once
+on the dedicated password-hashing executor, printing list p50/p99 and
+login throughput for each.
+
+Run from the backend directory:
+
+    DATABASE_URL=sqlite:////tmp/bench_login.db python -m benchmarks.bench_login_saturation --seconds 10
+
+Point DATABASE_URL at a scratch database: the benchmark creates a user in it.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from app.database import AsyncSessionLocal
+from app.main import API_V1_PREFIX, app
+from app.models import User
+from app.rate_limit import rate_limiter
+from app.security import create_access_token, get_password_hash
+from app.services.password_hashing import password_hasher
+
+PASSWORD = "bench-password"
+
+
+async def create_user() -> User:
+    name = f"bench-{uuid.uuid4().hex[:8]}"
+    async with AsyncSessionLocal() as db:
+        user = User(
+            username=name,
+            email=f"{name}@example.com",
+            hashed_password=get_password_hash(PASSWORD),
+            role="ADMIN",
+        )
+        db.add(user)
+        await db.commit()
+        return user
+
+
+async def run(client: httpx.AsyncClient, user: User, headers, seconds: float, logins: int, readers: int):
+    """Flood logins for seconds; return (list latencies in ms, logins done, logins shed)"""
+    latencies = []
+    done = shed = 0
+    deadline = time.perf_counter() + seconds
+    body = {"username": user.username, "password": PASSWORD}
+
+    async def login_worker():
+        nonlocal done, shed
+        while time.perf_counter() < deadline:
+            response = await client.post(f"{API_V1_PREFIX}/auth/login", json=body)
+            if response.status_code == 503:
+                shed += 1
+                await asyncio.sleep(float(response.headers.get("retry-after", "1")))
+                continue
+            response.raise_for_status()
+            done += 1
+
+    async def reader():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(f"{API_V1_PREFIX}/companies/", headers=headers)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(
+        *(login_worker() for _ in range(logins)),
+        *(reader() for _ in range(readers)),
+    )
+    return latencies, done, shed
+
+
+async def main_async(seconds: float, logins: int, readers: int):
+    # Every request comes from one user and address
+    rate_limiter.enabled = False
+    async with app.router.lifespan_context(app):
+        user = await create_user()
+        token = create_access_token({"sub": user.username, "uid": user.id, "role": user.role})
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=None) as client:
+            for label, dedicated in (("shared threadpool ", False), ("dedicated executor", True)):
+                if dedicated:
+                    del password_hasher._run
+                else:
+                    # Emulate hashing on the shared threadpool, as before
+                    password_hasher._run = lambda fn, *args: run_in_threadpool(fn, *args)
+                latencies, done, shed = await run(client, user, headers, seconds, logins, readers)
+                quantiles = statistics.quantiles(latencies, n=100)
+                print(
+                    f"{label}: list p50 {quantiles[49]:7.1f} ms  p99 {quantiles[98]:7.1f} ms  "
+                    f"({len(latencies)} lists)  logins {done / seconds:5.1f}/s  shed {shed}"
+                )
+        print(password_hasher.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--logins", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent list clients")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.seconds, args.logins, args.readers))
+
+
+if __name__ == "__main__":
+    main()
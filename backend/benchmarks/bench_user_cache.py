@@ -0,0 +1,100 @@
+"""
+Benchmark authenticated request throughput with and without the user cache.
+
+Starts the app in-process against a scratch database, creates one user and
+replays GET /api/v1/auth/me with its token, first with the authenticated
+user cache disabled and then enabled, counting SQL statements per request.
+
+Run from the backend directory:
+
+    DATABASE_URL=sqlite:////tmp/bench_user_cache.db python -m benchmarks.bench_user_cache --requests 5000
+
+Point DATABASE_URL at a scratch database: the benchmark creates a user in it.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+from app.database import AsyncSessionLocal, async_engine
+from app.main import API_V1_PREFIX, app
+from app.models import User
+from app.rate_limit import rate_limiter
+from app.security import create_access_token, get_password_hash
+from app.services.user_cache import authenticated_user_cache
+
+
+async def create_user() -> User:
+    name = f"bench-{uuid.uuid4().hex[:8]}"
+    async with AsyncSessionLocal() as db:
+        user = User(
+            username=name,
+            email=f"{name}@example.com",
+            hashed_password=get_password_hash("bench-password"),
+            role="USER",
+        )
+        db.add(user)
+        await db.commit()
+        return user
+
+
+async def run(client: httpx.AsyncClient, headers, requests: int, concurrency: int):
+    """Issue requests GETs, concurrency at a time; return (seconds, statements)"""
+    statements = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    async def worker(n: int):
+        for _ in range(n):
+            response = await client.get(f"{API_V1_PREFIX}/auth/me", headers=headers)
+            response.raise_for_status()
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        start = time.perf_counter()
+        per_worker = requests // concurrency
+        await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    return elapsed, statements, per_worker * concurrency
+
+
+async def main_async(requests: int, concurrency: int):
+    # Every request comes from one user and address
+    rate_limiter.enabled = False
+    async with app.router.lifespan_context(app):
+        user = await create_user()
+        token = create_access_token({"sub": user.username, "uid": user.id, "role": user.role})
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            # Warm up imports, pools and the route
+            await run(client, headers, concurrency, concurrency)
+            for enabled in (False, True):
+                authenticated_user_cache.clear()
+                authenticated_user_cache.enabled = enabled
+                elapsed, statements, issued = await run(client, headers, requests, concurrency)
+                label = "cache on " if enabled else "cache off"
+                print(
+                    f"{label}: {issued / elapsed:8.0f} req/s  "
+                    f"{elapsed / issued * 1000:6.2f} ms/req  "
+                    f"{statements / issued:4.2f} SQL statements/req"
+                )
+        print(authenticated_user_cache.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()